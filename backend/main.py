@@ -1,16 +1,74 @@
+import asyncio
+import time
 import uuid
+from contextlib import asynccontextmanager
 
-import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from starlette.middleware.cors import CORSMiddleware
-from starlette.responses import StreamingResponse
+from starlette.responses import JSONResponse, StreamingResponse, Response
 
-from backend.rag.rag_pipeline import RAGPipline
+from backend import metrics
+from backend.rag.chat_session import ChatSession
+from backend.rag.streaming import format_sse
 from backend.schemas import QueryResponse, QueryRequest, SessionResponse
+from backend.sessions import create_session_store
+
+
+def create_rag_pipeline():
+    # langchain, Chroma and the OpenAI clients are imported here, during warm-up, not with this module
+    from backend.rag.rag_pipeline import RAGPipline
+
+    return RAGPipline()
+
+
+async def warm_up():
+    # opens the collection and loads the chunk and lexical indexes off the event loop
+    start = time.perf_counter()
+    try:
+        rag = await asyncio.get_running_loop().run_in_executor(None, create_rag_pipeline)
+    except Exception as e:
+        print(f"Warm-up failed ({e!r}), /ready reports 503 and queries fail until restart.")
+        raise
+    app.state.rag = rag
+
+    warmup_seconds = time.perf_counter() - start
+    metrics.WARMUP_SECONDS.set(warmup_seconds)
+    print(f"Warm-up finished in {warmup_seconds:.2f}s, ready to answer queries.")
+
+    return rag
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # one shared engine per process; sessions only hold chat history.
+    # The engine is built in the background so /health answers at once; /ready reports when it is done
+    app.state.session_store = create_session_store()
+    metrics.ACTIVE_SESSIONS.set_function(app.state.session_store.size)
+    app.state.warmup = asyncio.create_task(warm_up())
+    yield
+    if is_ready():
+        await app.state.rag.aclose()
+    else:
+        app.state.warmup.cancel()
+    app.state.session_store.close()
+
+
+def is_ready() -> bool:
+    warmup = app.state.warmup
+
+    return warmup.done() and not warmup.cancelled() and warmup.exception() is None
+
+
+async def get_rag():
+    # requests that arrive during warm-up wait for it; shield keeps a disconnecting client from cancelling it
+    return await asyncio.shield(app.state.warmup)
+
 
 app = FastAPI(
     title="UCC API",
     description="Legal assistant for Ukrainian Criminal Code",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -25,9 +83,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-rag_sessions = {}
-
-
 @app.get("/")
 async def root():
     return {
@@ -37,43 +92,83 @@ async def root():
     }
 
 
+async def load_session(session_id):
+    session_id = session_id or str(uuid.uuid4())
+    session = await app.state.session_store.aget(session_id)
+
+    if session is None:
+        metrics.SESSIONS_CREATED.inc()
+        session = ChatSession()
+
+    return session_id, session
+
+
+def summary_saver(session_id):
+    # summaries start once the turn has been saved; fold them into the stored session,
+    # which may already hold newer turns (ChatSession.apply_summary checks it still matches)
+    # and may be written by another worker meanwhile (the store compares versions)
+    async def save_summary(fold):
+        return await app.state.session_store.aapply_summary(session_id, fold)
+
+    return save_summary
+
+
 @app.post("/query", response_model=QueryResponse)
 async def query(request: QueryRequest):
     try:
-        session_id = request.session_id or str(uuid.uuid4())
-
-        if session_id not in rag_sessions:
-            rag_sessions[session_id] = RAGPipline()
-
-        rag = rag_sessions[session_id]
+        rag = await get_rag()
+        session_id, session = await load_session(request.session_id)
 
-        answer = rag.run_rag_pipline(request.query)
+        answer = await rag.arun_rag_pipline(request.query, session)
+        await app.state.session_store.asave(session_id, session)
+        rag.summarize_history(session, summary_saver(session_id))
 
         return QueryResponse(
             answer=answer,
             session_id=session_id,
         )
     except Exception as e:
+        metrics.REQUEST_ERRORS.labels(endpoint="/query").inc()
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/query/stream")
-async def stream_query(request: QueryRequest):
+async def stream_query(request: QueryRequest, http_request: Request):
+    # "Accept: text/event-stream" gets sources / token / done / error events, anything else plain text
     try:
-        session_id = request.session_id or str(uuid.uuid4())
-
-        if session_id not in rag_sessions:
-            rag_sessions[session_id] = RAGPipline()
-
-        rag = rag_sessions[session_id]
+        rag = await get_rag()
+        session_id, session = await load_session(request.session_id)
 
         async def token_generator():
-            async for token in rag.stream_rag_pipeline(request.query):
-                yield token
+            try:
+                async for token in rag.stream_rag_pipeline(request.query, session):
+                    yield token
+            except Exception:
+                metrics.REQUEST_ERRORS.labels(endpoint="/query/stream").inc()
+                raise
+
+            await app.state.session_store.asave(session_id, session)
+            rag.summarize_history(session, summary_saver(session_id))
+
+        async def event_generator():
+            try:
+                async for event, data in rag.stream_rag_events(request.query, session):
+                    if event == "token":
+                        data = {"text": data}
+                    elif event == "done":
+                        await app.state.session_store.asave(session_id, session)
+                        rag.summarize_history(session, summary_saver(session_id))
+                        data = {**data, "session_id": session_id}
+                    yield format_sse(event, data)
+            except Exception as e:
+                metrics.REQUEST_ERRORS.labels(endpoint="/query/stream").inc()
+                yield format_sse("error", {"detail": str(e)})
+
+        use_sse = "text/event-stream" in http_request.headers.get("accept", "")
 
         return StreamingResponse(
-            token_generator(),
-            media_type="text/plain",
+            event_generator() if use_sse else token_generator(),
+            media_type="text/event-stream" if use_sse else "text/plain",
             headers={
                 "X-Session-ID": session_id,
                 "Cache-Control": "no-cache",
@@ -82,6 +177,7 @@ async def stream_query(request: QueryRequest):
         )
 
     except Exception as e:
+        metrics.REQUEST_ERRORS.labels(endpoint="/query/stream").inc()
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -89,7 +185,8 @@ async def stream_query(request: QueryRequest):
 async def create_session():
     session_id = str(uuid.uuid4())
 
-    rag_sessions[session_id] = RAGPipline()
+    await app.state.session_store.asave(session_id, ChatSession())
+    metrics.SESSIONS_CREATED.inc()
 
     return SessionResponse(
         session_id=session_id,
@@ -99,9 +196,8 @@ async def create_session():
 
 @app.post("/session/{session_id}", response_model=SessionResponse)
 async def delete_session(session_id: str):
-    if session_id in rag_sessions:
-        del rag_sessions[session_id]
-
+    if await app.state.session_store.adelete(session_id):
+        metrics.SESSIONS_DELETED.inc()
         return SessionResponse(
             session_id=session_id,
             message="Session deleted",
@@ -112,10 +208,13 @@ async def delete_session(session_id: str):
 
 @app.post("/session/{session_id}/clear", response_model=SessionResponse)  # ✅ Removed extra }
 async def clear_session(session_id: str):
-    if session_id not in rag_sessions:
+    session = await app.state.session_store.aget(session_id)
+
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    rag_sessions[session_id].clear_history()
+    session.clear_history()
+    await app.state.session_store.asave(session_id, session)
 
     return SessionResponse(
         session_id=session_id,
@@ -123,15 +222,55 @@ async def clear_session(session_id: str):
     )
 
 
+@app.post("/index/reload")
+async def reload_index():
+    rag = await get_rag()
+    await asyncio.get_running_loop().run_in_executor(rag.retrieval_executor, rag.reload_index)
+
+    return {
+        "message": "Chunk index reloaded",
+        "articles": len(rag.chunk_index.articles),
+        "sections": len(rag.chunk_index.sections),
+    }
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    # the active-sessions gauge queries the session store, so the scrape runs off the event loop
+    data = await asyncio.get_running_loop().run_in_executor(None, generate_latest)
+
+    return Response(data, media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/health")
 async def health_check():
+    session_stats = await app.state.session_store.astats()
+
     return {
         "status": "healthy",
-        "active_sessions": len(rag_sessions)
+        "ready": is_ready(),
+        "active_sessions": session_stats["active_sessions"],
+        "sessions": session_stats,
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    # 503 until warm-up has finished, so load balancers only route queries to a warmed-up process
+    warmup = app.state.warmup
+
+    if not warmup.done():
+        return JSONResponse({"status": "warming up"}, status_code=503)
+
+    if not is_ready():
+        detail = "cancelled" if warmup.cancelled() else str(warmup.exception())
+        return JSONResponse({"status": "failed", "detail": detail}, status_code=503)
+
+    return {"status": "ready"}
+
+
 if __name__ == "__main__":
     # uvicorn main:app --reload --host 0.0.0.0 --port 8000
+    import uvicorn
 
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,159 @@
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+ANSWER_CACHE_LOOKUPS = Counter(
+    "ucc_answer_cache_lookups_total",
+    "Semantic answer cache lookups for first-turn queries",
+    ["result"],
+)
+ANSWER_CACHE_HIT_RATIO = Gauge(
+    "ucc_answer_cache_hit_ratio",
+    "Share of semantic answer cache lookups that were hits",
+)
+ANSWER_CACHE_SIZE = Gauge(
+    "ucc_answer_cache_entries",
+    "Answers currently held by the semantic answer cache",
+)
+DIRECT_ARTICLE_QUERIES = Counter(
+    "ucc_direct_article_queries_total",
+    "Queries naming an article that was fetched from the article index",
+    ["mode"],
+)
+RETRIEVAL_DEGRADED = Counter(
+    "ucc_retrieval_degraded_total",
+    "Queries answered with lexical-only retrieval because the embedding API failed or timed out",
+)
+COALESCED_REQUESTS = Counter(
+    "ucc_coalesced_requests_total",
+    "First-turn requests by whether they started a shared answer (leader) or joined one in flight (follower)",
+    ["mode", "role"],
+)
+COALESCING_IN_FLIGHT = Gauge(
+    "ucc_coalescing_in_flight",
+    "Shared answers currently being produced for coalesced /query and /query/stream requests",
+)
+STREAM_TIME_TO_FIRST_TOKEN = Histogram(
+    "ucc_stream_time_to_first_token_seconds",
+    "Time from a streaming request to its first answer frame",
+    ["source"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20),
+)
+
+
+# per-stage latency; buckets span cache hits (sub-millisecond) to slow API calls
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+QUERY_EMBEDDING_SECONDS = Histogram(
+    "ucc_query_embedding_seconds",
+    "Time to get the query embedding, including cache hits",
+    buckets=STAGE_BUCKETS,
+)
+SEARCH_SECONDS = Histogram(
+    "ucc_search_seconds",
+    "Time spent in vector / hybrid / lexical search",
+    ["mode"],
+    buckets=STAGE_BUCKETS,
+)
+CONTEXT_BUILD_SECONDS = Histogram(
+    "ucc_context_build_seconds",
+    "Time spent in ContextBuilder.build",
+    buckets=STAGE_BUCKETS,
+)
+CONTEXT_SIBLING_FETCHES = Counter(
+    "ucc_context_sibling_fetches_total",
+    "Vector store lookups made by ContextBuilder for chunks missing from the chunk index",
+)
+CONTEXT_TOKENS = Histogram(
+    "ucc_context_tokens",
+    "Tokens of retrieved context placed in the prompt per request",
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000),
+)
+CONTEXT_PASSAGES = Counter(
+    "ucc_context_passages_total",
+    "Retrieved passages by what the context token budget did with them "
+    "(full, shortened, truncated, dropped, duplicate)",
+    ["outcome"],
+)
+PROMPT_TOKENS = Histogram(
+    "ucc_prompt_tokens",
+    "Tokens sent to the chat model per request (system prompt, context, history and query)",
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000),
+)
+HISTORY_TOKENS = Histogram(
+    "ucc_history_tokens",
+    "Tokens of chat history (summary and verbatim turns) placed in the prompt per request",
+    buckets=(0, 250, 500, 1000, 2000, 4000, 8000, 16000),
+)
+HISTORY_SUMMARIES = Counter(
+    "ucc_history_summaries_total",
+    "Background chat history summaries by result (applied, stale, failed)",
+    ["result"],
+)
+HISTORY_SUMMARY_SECONDS = Histogram(
+    "ucc_history_summary_seconds",
+    "Time to summarize older turns, off the request path",
+    buckets=STAGE_BUCKETS,
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "ucc_llm_time_to_first_token_seconds",
+    "Time from the streaming chat model call to its first token",
+    buckets=STAGE_BUCKETS,
+)
+LLM_SECONDS = Histogram(
+    "ucc_llm_seconds",
+    "Total chat model call time",
+    ["mode"],
+    buckets=STAGE_BUCKETS + (20, 40, 60),
+)
+SESSIONS_CREATED = Counter(
+    "ucc_sessions_created_total",
+    "Chat sessions created, explicitly or by a query without a known session id",
+)
+SESSIONS_DELETED = Counter(
+    "ucc_sessions_deleted_total",
+    "Chat sessions deleted through the API",
+)
+ACTIVE_SESSIONS = Gauge(
+    "ucc_active_sessions",
+    "Sessions currently held by the session store",
+)
+WARMUP_SECONDS = Gauge(
+    "ucc_warmup_seconds",
+    "Time from application startup to a ready RAG engine (collection opened, indexes loaded)",
+)
+REQUEST_ERRORS = Counter(
+    "ucc_request_errors_total",
+    "Requests that failed with an error, by endpoint",
+    ["endpoint"],
+)
+
+
+class QueryEmbeddingCacheCollector:
+    # reads the counters kept by VectorDB's QueryEmbeddingCache at scrape time
+
+    def __init__(self):
+        self.cache = None
+
+    def collect(self):
+        cache = self.cache
+        if cache is None:
+            return
+
+        yield CounterMetricFamily(
+            "ucc_query_embedding_cache_hits", "Query embeddings served from the cache", value=cache.hits
+        )
+        yield CounterMetricFamily(
+            "ucc_query_embedding_cache_misses", "Query embeddings requested from the embedding API",
+            value=cache.misses
+        )
+        yield CounterMetricFamily(
+            "ucc_query_embedding_api_seconds", "Time spent in the embedding API for query embeddings",
+            value=cache.embedding_seconds
+        )
+        yield GaugeMetricFamily(
+            "ucc_query_embedding_cache_entries", "Query embeddings currently cached", value=cache.size()
+        )
+
+
+QUERY_EMBEDDING_CACHE = QueryEmbeddingCacheCollector()
+REGISTRY.register(QUERY_EMBEDDING_CACHE)
@@ -0,0 +1,98 @@
+import threading
+import time
+from typing import Dict, Hashable, List, NamedTuple, Optional
+
+import numpy as np
+
+
+class CachedAnswer(NamedTuple):
+    answer: str
+    sources: List[Dict]  # sources of the context the answer was generated from
+
+
+class SemanticAnswerCache:
+    """
+    Answers to first-turn questions keyed by query embedding. A lookup hits when the
+    cosine similarity to a stored query reaches the threshold, the entry is younger
+    than ttl_seconds and its exact key matches; the least recently used entry is
+    evicted when full. The exact key keeps near-identical questions about different
+    articles ("стаття 185" / "стаття 186") apart, which the embeddings do not.
+    """
+
+    def __init__(self, similarity_threshold: float, ttl_seconds: float, max_entries: int):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._embeddings = None  # (max_entries, dim) float32, rows are unit vectors
+        self._answers: List[Optional[CachedAnswer]] = [None] * self.max_entries
+        self._keys: List[Optional[Hashable]] = [None] * self.max_entries
+        self._created = np.zeros(self.max_entries)
+        self._last_used = np.zeros(self.max_entries)
+        self._size = 0
+
+    def get(self, embedding: List[float], key: Hashable = None) -> Optional[CachedAnswer]:
+        query = self._normalize(embedding)
+
+        with self._lock:
+            if self._size:
+                # expired entries and entries with another key are masked out before the best match is taken
+                now = time.time()
+                valid = now - self._created[:self._size] <= self.ttl_seconds
+                valid &= np.fromiter((entry_key == key for entry_key in self._keys[:self._size]), bool, self._size)
+                similarities = np.where(valid, self._embeddings[:self._size] @ query, -np.inf)
+                best = int(np.argmax(similarities))
+
+                if similarities[best] >= self.similarity_threshold:
+                    self._last_used[best] = now
+                    self.hits += 1
+                    return self._answers[best]
+
+            self.misses += 1
+            return None
+
+    def put(self, embedding: List[float], answer: str, sources: List[Dict], key: Hashable = None):
+        vector = self._normalize(embedding)
+
+        with self._lock:
+            if self._embeddings is None:
+                self._embeddings = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+            if self._size < self.max_entries:
+                slot = self._size
+                self._size += 1
+            else:
+                now = time.time()
+                expired = np.flatnonzero(now - self._created > self.ttl_seconds)
+                slot = int(expired[0]) if expired.size else int(np.argmin(self._last_used))
+
+            now = time.time()
+            self._embeddings[slot] = vector
+            self._answers[slot] = CachedAnswer(answer, sources)
+            self._keys[slot] = key
+            self._created[slot] = now
+            self._last_used[slot] = now
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def size(self) -> int:
+        return self._size
+
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+
+        return vector / norm if norm else vector
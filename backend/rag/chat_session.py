@@ -0,0 +1,61 @@
+import json
+
+import config
+
+# langchain_core.messages is imported inside the methods: backend.main imports this module through
+# the session store, and langchain loads during warm-up instead of with the API module
+
+
+class ChatSession:
+    def __init__(self, chat_history=None, summary: str = ""):
+        self.max_history_messages = config.MAX_HISTORY_MESSAGES
+        self.chat_history = chat_history or []
+        self.summary = summary  # rolling summary of the turns folded out of chat_history
+
+    def add_exchange(self, query: str, response: str):
+        from langchain_core.messages import AIMessage, HumanMessage
+
+        self.chat_history.append(HumanMessage(content=query))
+        self.chat_history.append(AIMessage(content=response))
+
+        if len(self.chat_history) > self.max_history_messages:
+            self.chat_history = self.chat_history[-self.max_history_messages:]
+
+    def has_history(self) -> bool:
+        return bool(self.chat_history or self.summary)
+
+    def apply_summary(self, fold) -> bool:
+        # a summary made from an earlier copy of the session applies only if that copy's summary
+        # and oldest messages are still in place, otherwise the session moved on and it is dropped
+        count = len(fold.messages)
+        if self.summary != fold.previous_summary or self.chat_history[:count] != fold.messages:
+            return False
+
+        self.chat_history = self.chat_history[count:]
+        self.summary = fold.summary
+
+        return True
+
+    def clear_history(self):
+        self.chat_history = []
+        self.summary = ""
+
+    def to_json(self) -> str:
+        from langchain_core.messages import messages_to_dict
+
+        return json.dumps(
+            {"messages": messages_to_dict(self.chat_history), "summary": self.summary},
+            ensure_ascii=False
+        )
+
+    @classmethod
+    def from_json(cls, data: str) -> "ChatSession":
+        from langchain_core.messages import messages_from_dict
+
+        data = json.loads(data)
+
+        # sessions stored before summaries existed are a bare message list
+        if isinstance(data, list):
+            return cls(chat_history=messages_from_dict(data))
+
+        return cls(chat_history=messages_from_dict(data["messages"]), summary=data.get("summary", ""))
@@ -1,88 +1,187 @@
+import config
+from backend import metrics
+from backend.rag.token_counter import TokenCounter
+from chunk_index import ChunkIndex
 from vector_db import VectorDB
 
+FINAL_PROVISIONS_PART = "ПРИКІНЦЕВІ ТА ПЕРЕХІДНІ ПОЛОЖЕННЯ"
+
 
 class ContextBuilder:
-    def __init__(self):
-        self.vectordb = VectorDB()
+    def __init__(self, vectordb: VectorDB, chunk_index: ChunkIndex = None, token_counter: TokenCounter = None):
+        self.vectordb = vectordb
+        self.chunk_index = chunk_index or ChunkIndex()
+        self.token_counter = token_counter or TokenCounter(config.GPT_MODEL)
+        self.token_budget = config.CONTEXT_TOKEN_BUDGET
 
     def build(self, retrieved_chunks):
         if not retrieved_chunks:
             return ""
 
-        all_context = []
+        # group hits so every article / section is expanded and emitted once, in first-hit order
+        blocks = {}
+        article_nums = set()
+        section_neighbors = {}
+        section_hits = {}
 
         for chunk in retrieved_chunks:
             metadata = chunk.metadata
 
             if "article_num" in metadata:
-                context = self._build_article_context(chunk)
-            elif "section" in metadata and metadata.get("part") == "ПРИКІНЦЕВІ ТА ПЕРЕХІДНІ ПОЛОЖЕННЯ":
-                context = self._build_section_context(chunk)
-            elif "act_name" in metadata:
-                context = chunk.page_content
+                key = ("article", metadata["article_num"])
+                blocks.setdefault(key, chunk)
+
+                if metadata.get("total_chunks", 1) > 1:
+                    article_nums.add(metadata["article_num"])
+            elif "section" in metadata and metadata.get("part") == FINAL_PROVISIONS_PART:
+                section_key = (metadata["part"], metadata["section"])
+                blocks.setdefault(("section",) + section_key, chunk)
+                section_hits.setdefault(section_key, {})[metadata.get("chunk_index", 0)] = chunk.page_content
+
+                section_neighbors.setdefault(section_key, set()).update(
+                    self._get_neighbor_indices(metadata.get("chunk_index", 0), metadata.get("total_chunks", 1))
+                )
             else:
-                context = chunk.page_content
+                blocks.setdefault(("chunk", chunk.page_content), chunk)
+
+        # expansion is a dictionary lookup; Chroma is only asked for what the index does not know
+        article_texts = {}
+        for article_num in article_nums:
+            indexed = self.chunk_index.get_article(article_num)
+            if indexed is not None:
+                article_texts[article_num] = indexed[2]
+
+        section_texts = {}
+        for (part_name, section_name), indices in section_neighbors.items():
+            window = self.chunk_index.get_section_window(part_name, section_name, sorted(indices))
+            if window is not None:
+                section_texts[(part_name, section_name)] = window
+
+        article_chunks, section_chunks = self._fetch_siblings(
+            article_nums - article_texts.keys(),
+            {key: indices for key, indices in section_neighbors.items() if key not in section_texts}
+        )
 
-            all_context.append(context)
+        for article_num, chunks in article_chunks.items():
+            chunks.sort(key=lambda x: x[0])
+            article_texts[article_num] = " ".join(doc for _, doc in chunks).strip()
+
+        for section_key, chunks in section_chunks.items():
+            chunks.sort(key=lambda x: x[0])
+            section_texts[section_key] = [doc for _, doc in chunks]
+
+        # blocks are in retrieval rank order, each with its alternatives from most to least complete
+        passages = []
+
+        for key, chunk in blocks.items():
+            if key[0] == "article":
+                passages.append(self._article_passages(chunk, article_texts.get(key[1])))
+            elif key[0] == "section":
+                hits = section_hits[key[1:]]
+                passages.append(self._section_passages(
+                    chunk, section_texts.get(key[1:], []), [hits[i] for i in sorted(hits)]
+                ))
+            else:
+                passages.append([chunk.page_content])
+
+        return "\n".join(self._fit_budget(passages)).strip()
+
+    def _fit_budget(self, passages):
+        # best-ranked passages get the budget first; a passage that does not fit falls back to its
+        # shorter alternative, and one whose retrieved text is already in the context is skipped
+        selected = []
+        used = 0
+
+        for alternatives in passages:
+            if any(alternatives[-1] in chosen for chosen in selected):
+                metrics.CONTEXT_PASSAGES.labels(outcome="duplicate").inc()
+                continue
+
+            for i, text in enumerate(alternatives):
+                tokens = self.token_counter.count(text)
+                if self.token_budget is None or used + tokens <= self.token_budget:
+                    selected.append(text)
+                    used += tokens
+                    outcome = "full" if i == 0 else "shortened"
+                    break
+            else:
+                if selected:
+                    outcome = "dropped"
+                else:
+                    # the best hit alone is over the budget, keep as much of it as fits
+                    text = self.token_counter.truncate(alternatives[-1], self.token_budget)
+                    selected.append(text)
+                    used += self.token_counter.count(text)
+                    outcome = "truncated"
+
+            metrics.CONTEXT_PASSAGES.labels(outcome=outcome).inc()
+
+        metrics.CONTEXT_TOKENS.observe(used)
+
+        return selected
+
+    def _fetch_siblings(self, article_nums, section_neighbors):
+        # one batched lookup for every multi-chunk article and every section window instead of one per hit
+        conditions = []
+
+        if article_nums:
+            conditions.append({"article_num": {"$in": sorted(article_nums)}})
+
+        for (part_name, section_name), indices in section_neighbors.items():
+            conditions.append({
+                "$and": [
+                    {"part": part_name},
+                    {"section": section_name},
+                    {"chunk_index": {"$in": sorted(indices)}},
+                ]
+            })
+
+        article_chunks = {}
+        section_chunks = {}
+
+        if not conditions:
+            return article_chunks, section_chunks
+
+        where = conditions[0] if len(conditions) == 1 else {"$or": conditions}
+        metrics.CONTEXT_SIBLING_FETCHES.inc()
+        documents, metadatas = self.vectordb.get_chunks(where)
+
+        for doc, meta in zip(documents, metadatas):
+            if meta.get("article_num") in article_nums:
+                article_chunks.setdefault(meta["article_num"], []).append((meta.get("chunk_index", 0), doc))
+            else:
+                section_key = (meta.get("part"), meta.get("section"))
+                if meta.get("chunk_index") in section_neighbors.get(section_key, ()):
+                    section_chunks.setdefault(section_key, []).append((meta["chunk_index"], doc))
 
-        return "\n".join(all_context).strip()
+        return article_chunks, section_chunks
 
-    def _build_article_context(self, chunk):
+    @staticmethod
+    def _article_passages(chunk, article_text):
         metadata = chunk.metadata
 
         part_name = metadata["part"]
         section_name = metadata["section"]
-        article_num = metadata["article_num"]
-
-        if metadata.get("total_chunks", 1) == 1:
-            return f"{part_name}. {section_name}. {chunk.page_content}"
-
-        data = self.vectordb.vectordb._collection.get(
-            where={"article_num": article_num}
-        )
-
-        documents = data["documents"]
-        metadatas = data["metadatas"]
-
-        sorted_chunks = sorted(
-            zip(documents, metadatas),
-            key=lambda x: x[1].get("chunk_index", 0)
-        )
 
-        result = " ".join(doc for doc, _ in sorted_chunks).strip()
+        if not article_text or article_text == chunk.page_content:
+            return [f"{part_name}. {section_name}. {chunk.page_content}"]
 
-        return f"{part_name}. {section_name}. {result}"
+        return [f"{part_name}. {section_name}. {article_text}", f"{part_name}. {section_name}. {chunk.page_content}"]
 
-    def _build_section_context(self, chunk):
+    @staticmethod
+    def _section_passages(chunk, neighbor_texts, hit_texts):
         metadata = chunk.metadata
 
         part_name = metadata["part"]
         section_name = metadata["section"]
-        chunk_index = metadata.get("chunk_index", 0)
-        total_chunks = metadata.get("total_chunks", 1)
-
-        data = self.vectordb.vectordb._collection.get(
-            where={
-                "section": section_name,
-                "part": part_name
-            }
-        )
-
-        documents = data["documents"]
-        metadatas = data["metadatas"]
-
-        neighbor_indices = self._get_neighbor_indices(chunk_index, total_chunks)
 
-        merged_docs = [
-            (meta["chunk_index"], doc)
-            for doc, meta in zip(documents, metadatas)
-            if meta.get("chunk_index") in neighbor_indices
-        ]
+        result = " ".join(neighbor_texts).strip()
+        hits = " ".join(hit_texts).strip()
 
-        merged_docs.sort(key=lambda x: x[0])
-        result = " ".join(doc for _, doc in merged_docs).strip()
+        if not result or result == hits:
+            return [f"{part_name}. {section_name}. {hits}"]
 
-        return f"{part_name}. {section_name}. {result}"
+        return [f"{part_name}. {section_name}. {result}", f"{part_name}. {section_name}. {hits}"]
 
     @staticmethod
     def _get_neighbor_indices(idx, total):
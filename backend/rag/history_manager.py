@@ -0,0 +1,83 @@
+from typing import List, NamedTuple, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.output_parsers import StrOutputParser
+
+import config
+from backend.rag.token_counter import TokenCounter
+
+
+class HistoryFold(NamedTuple):
+    messages: List[BaseMessage]  # oldest messages of the session that the summary replaces
+    previous_summary: str
+    summary: str
+
+
+class HistoryManager:
+    """
+    Chat history for the prompt: the session's rolling summary followed by the most recent
+    turns verbatim, as many as fit in token_budget (the latest turn is always kept).
+    Older turns are folded into the summary by summarize / asummarize, which the pipeline
+    runs after the response is complete. token_budget None sends the whole history.
+    """
+
+    def __init__(self, llm: BaseChatModel, token_counter: TokenCounter, token_budget: Optional[int]):
+        self.token_counter = token_counter
+        self.token_budget = token_budget
+        self.chain = llm | StrOutputParser()
+
+    def prompt_history(self, session) -> List[BaseMessage]:
+        _, recent = self._split(session.chat_history)
+
+        if not session.summary:
+            return recent
+
+        return [SystemMessage(content=f"Summary of the earlier conversation: {session.summary}")] + recent
+
+    def pending_fold(self, session) -> Optional[List[BaseMessage]]:
+        # messages that no longer fit verbatim and wait to be summarized
+        older, _ = self._split(session.chat_history)
+
+        return older or None
+
+    def summarize(self, messages: List[BaseMessage], previous_summary: str) -> HistoryFold:
+        summary = self.chain.invoke(self._summary_messages(messages, previous_summary))
+
+        return HistoryFold(messages, previous_summary, summary.strip())
+
+    async def asummarize(self, messages: List[BaseMessage], previous_summary: str) -> HistoryFold:
+        summary = await self.chain.ainvoke(self._summary_messages(messages, previous_summary))
+
+        return HistoryFold(messages, previous_summary, summary.strip())
+
+    def _split(self, messages: List[BaseMessage]):
+        if self.token_budget is None:
+            return [], messages
+
+        # whole turns from the newest back while they fit
+        start = len(messages)
+        used = 0
+
+        while start >= 2:
+            tokens = sum(self.token_counter.count(message.content) for message in messages[start - 2:start])
+            if used + tokens > self.token_budget and start < len(messages):
+                break
+
+            used += tokens
+            start -= 2
+
+        return messages[:start], messages[start:]
+
+    @staticmethod
+    def _summary_messages(messages: List[BaseMessage], previous_summary: str) -> List[BaseMessage]:
+        transcript = "\n".join(
+            f"{'User' if isinstance(message, HumanMessage) else 'Assistant'}: {message.content}"
+            for message in messages
+        )
+
+        return [SystemMessage(content=config.HISTORY_SUMMARY_PROMPT_TEMPLATE.format(
+            summary=previous_summary or "(empty)",
+            transcript=transcript,
+            max_words=config.HISTORY_SUMMARY_MAX_WORDS,
+        ))]
@@ -0,0 +1,80 @@
+import re
+from typing import List, NamedTuple
+
+from langchain_core.documents import Document
+
+from chunk_index import ChunkIndex
+
+
+class QueryAnalysis(NamedTuple):
+    article_nums: List[str]  # referenced articles that exist in the index, in query order
+    skip_vector_search: bool  # the query is nothing but a reference to those articles
+
+
+class QueryAnalyzer:
+    # "стаття 185", "статті 185, 186", "статтю 336-1", "ст. 115 ККУ", "ст.ст. 185 та 186"
+    ARTICLE_REFERENCE_PATTERN = re.compile(
+        r"(?<!\w)(?:стат(?:тя|ті|тю|тею|тей|тями|тях|тям)|ст\.?\s*ст|ст)\.?\s*"
+        r"(?P<nums>\d+(?:\s*-\s*\d+)?(?:\s*(?:,|;|та|і|й|або)\s*\d+(?:\s*-\s*\d+)?)*)",
+        re.IGNORECASE
+    )
+    ARTICLE_NUMBER_PATTERN = re.compile(r"(\d+)(?:\s*-\s*(\d+))?")
+    WORD_PATTERN = re.compile(r"\w+")
+
+    # words that do not change what is asked when they surround an article reference
+    FILLER_WORDS = {
+        "кк", "кку", "кримінального", "кримінальний", "кодексу", "кодекс", "україни",
+        "що", "каже", "говорить", "розкажи", "розкажіть", "покажи", "покажіть", "про", "текст",
+        "зміст", "поясни", "поясніть", "наведи", "прочитай", "яка", "який", "яке", "є", "це",
+        "в", "у", "згідно", "з", "та", "і", "й", "будь", "ласка", "мені",
+        "ч", "частина", "частини", "частину", "п", "пункт", "пункту",
+    }
+
+    def __init__(self, chunk_index: ChunkIndex):
+        self.chunk_index = chunk_index
+
+    def analyze(self, query: str) -> QueryAnalysis:
+        article_nums = []
+        referenced = 0
+
+        for match in self.ARTICLE_REFERENCE_PATTERN.finditer(query):
+            for number_match in self.ARTICLE_NUMBER_PATTERN.finditer(match.group("nums")):
+                referenced += 1
+                article_num = number_match.group(1)
+                if number_match.group(2):
+                    article_num += "-" + number_match.group(2)
+
+                if self.chunk_index.get_article(article_num) is not None and article_num not in article_nums:
+                    article_nums.append(article_num)
+
+        if not article_nums:
+            return QueryAnalysis(article_nums=[], skip_vector_search=False)
+
+        remainder = self.ARTICLE_REFERENCE_PATTERN.sub(" ", query)
+        content_words = [
+            word for word in self.WORD_PATTERN.findall(remainder.casefold())
+            if word not in self.FILLER_WORDS and not word.isdigit()
+        ]
+
+        return QueryAnalysis(
+            article_nums=article_nums,
+            skip_vector_search=not content_words and len(article_nums) == referenced,
+        )
+
+    def article_documents(self, analysis: QueryAnalysis) -> List[Document]:
+        documents = []
+
+        for article_num in analysis.article_nums:
+            part, section, text = self.chunk_index.get_article(article_num)
+            documents.append(Document(
+                page_content=text,
+                metadata={
+                    "part": part,
+                    "section": section,
+                    "article_num": article_num,
+                    "chunk_index": 0,
+                    "total_chunks": 1,
+                },
+            ))
+
+        return documents
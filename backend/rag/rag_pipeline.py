@@ -1,37 +1,111 @@
-from langchain_core.messages import HumanMessage, AIMessage
+import asyncio
+import inspect
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import httpx
+from langchain_core.language_models import BaseChatModel
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_openai import ChatOpenAI
 from pydantic import SecretStr
 
 import config
+from chunk_index import ChunkIndex
+from backend import metrics
+from backend.rag.answer_cache import SemanticAnswerCache
+from backend.rag.chat_session import ChatSession
 from backend.rag.context_builder import ContextBuilder
+from backend.rag.history_manager import HistoryFold, HistoryManager
+from backend.rag.query_analyzer import QueryAnalyzer, QueryAnalysis
+from backend.rag.single_flight import SingleFlight
+from backend.rag.streaming import coalesce_tokens
+from backend.rag.token_counter import TokenCounter
+from query_embedding_cache import QueryEmbeddingCache
 from vector_db import VectorDB
 
+SOURCE_METADATA_KEYS = ("part", "section", "article_num", "act_name")
+
+
+class Retrieval(NamedTuple):
+    query_embedding: Optional[List[float]]  # set only when the answer may be stored in the answer cache
+    cached_answer: Optional[str]
+    context: Optional[str]
+    sources: List[Dict]  # distinct parts / sections / articles the context was built from, in rank order
+
 
 class RAGPipline:
-    def __init__(self):
-        self.vectordb = VectorDB()
-        self.context_builder = ContextBuilder()
+    """
+    Process-wide RAG engine: one vector store handle, one pooled HTTP client pair
+    for the chat model and one compiled chain, shared by every chat session.
+    Per-user state lives in ChatSession.
+    """
+
+    def __init__(self, vectordb: VectorDB = None, llm: BaseChatModel = None, llm_stream: BaseChatModel = None):
+        # llm / llm_stream may be injected (benchmarks use local fakes); by default both are ChatOpenAI
+        self.vectordb = vectordb or VectorDB()
+        self.chunk_index = ChunkIndex().load(self.vectordb)
+        self.token_counter = TokenCounter(config.GPT_MODEL)
+        self.context_builder = ContextBuilder(self.vectordb, self.chunk_index, self.token_counter)
+        self.query_analyzer = QueryAnalyzer(self.chunk_index)
+
+        self.hybrid_search_enabled = config.HYBRID_SEARCH_ENABLED
+        if self.hybrid_search_enabled:
+            self.vectordb.load_lexical_index()
         self.number_of_results_to_return = config.NUMBER_OF_RESULTS_TO_RETURN
 
+        self.answer_cache = None
+        if config.ANSWER_CACHE_ENABLED:
+            self.answer_cache = SemanticAnswerCache(
+                similarity_threshold=config.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+                ttl_seconds=config.ANSWER_CACHE_TTL_SECONDS,
+                max_entries=config.ANSWER_CACHE_MAX_ENTRIES,
+            )
+            metrics.ANSWER_CACHE_HIT_RATIO.set_function(self.answer_cache.hit_ratio)
+            metrics.ANSWER_CACHE_SIZE.set_function(self.answer_cache.size)
+
+        metrics.QUERY_EMBEDDING_CACHE.cache = self.vectordb.query_embedding_cache
+
+        # concurrent identical first-turn queries share one answer, streamed or not; index_version
+        # keeps requests made before and after a reload apart
+        self.coalescing_enabled = config.REQUEST_COALESCING_ENABLED
+        self.index_version = 0
+        self.flights = SingleFlight()
+
+        # Chroma lookups are blocking, so async callers run them here instead of on the event loop
+        self.retrieval_executor = ThreadPoolExecutor(
+            max_workers=config.RETRIEVAL_MAX_WORKERS,
+            thread_name_prefix="retrieval",
+        )
+
         self.api_key = SecretStr(config.OPENAI_API_KEY)
         self.model_name = config.GPT_MODEL
-        self.llm = ChatOpenAI(
+
+        # llm and llm_stream talk to the same model, so they share one connection pool
+        self.http_client = httpx.Client()
+        self.http_async_client = httpx.AsyncClient()
+
+        self.llm = llm or ChatOpenAI(
             model=self.model_name,
             api_key=self.api_key,
             temperature=0,
+            base_url=config.OPENAI_BASE_URL,
+            http_client=self.http_client,
+            http_async_client=self.http_async_client,
         )
 
-        self.llm_stream = ChatOpenAI(
+        self.llm_stream = llm_stream or ChatOpenAI(
             model=self.model_name,
             api_key=self.api_key,
             temperature=0,
-            streaming=True
+            streaming=True,
+            base_url=config.OPENAI_BASE_URL,
+            http_client=self.http_client,
+            http_async_client=self.http_async_client,
         )
 
-        self.chat_history = []
-
         self.prompt = ChatPromptTemplate.from_messages([
             (
                 "system",
@@ -41,7 +115,7 @@ class RAGPipline:
                     Only answer questions related to the Criminal Code of Ukraine.
                     Provide precise answers in Ukrainian.
                     Do not answer questions outside the Criminal Code.
-                    
+
                     Context: {context}
                 """
             ),
@@ -53,64 +127,368 @@ class RAGPipline:
             )
         ])
 
-        self.chain = self.prompt | self.llm | StrOutputParser()
+        # the prompt is formatted separately (_prompt_messages) so its size can be recorded
+        self.chain = self.llm | StrOutputParser()
+
+        # older turns are summarized after the response: in a task on async paths, in this pool on sync ones
+        self.history_manager = HistoryManager(self.llm, self.token_counter, config.HISTORY_TOKEN_BUDGET)
+        self.summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="history")
+        self.summary_tasks = set()
+
+    def retrieve_context(self, query, analysis: QueryAnalysis, query_embedding=None):
+        # explicitly referenced articles come straight from the index and rank first.
+        # query_embedding is None here only when embedding the query failed, so hybrid search goes lexical-only
+        retrieve_results_from_db = self.query_analyzer.article_documents(analysis)
+
+        if analysis.article_nums:
+            metrics.DIRECT_ARTICLE_QUERIES.labels(
+                mode="skip_vector_search" if analysis.skip_vector_search else "merged"
+            ).inc()
+
+        if not analysis.skip_vector_search:
+            retrieve_results_from_db += self._search(query, query_embedding)
+
+        with metrics.CONTEXT_BUILD_SECONDS.time():
+            context = self.context_builder.build(retrieve_results_from_db)
+
+        return context, self._sources(retrieve_results_from_db)
 
-    def run_rag_pipline(self, query):
-        retrieve_results_from_db = self.vectordb.similarity_search(
-            query,
-            self.number_of_results_to_return
+    @staticmethod
+    def _sources(documents) -> List[Dict]:
+        sources = {}
+        for doc in documents:
+            source = {key: doc.metadata[key] for key in SOURCE_METADATA_KEYS if key in doc.metadata}
+            sources.setdefault(tuple(source.items()), source)
+
+        return list(sources.values())
+
+    def _search(self, query, query_embedding):
+        if not self.hybrid_search_enabled:
+            with metrics.SEARCH_SECONDS.labels(mode="vector").time():
+                return self.vectordb.similarity_search(
+                    query,
+                    self.number_of_results_to_return,
+                    embedding=query_embedding
+                )
+
+        with metrics.SEARCH_SECONDS.labels(mode="lexical" if query_embedding is None else "hybrid").time():
+            return self.vectordb.hybrid_search(
+                query,
+                self.number_of_results_to_return,
+                embedding=query_embedding,
+                lexical_only=query_embedding is None
+            )
+
+    def _uses_answer_cache(self, session: ChatSession):
+        return self.answer_cache is not None and not session.has_history()
+
+    def retrieve(self, query, session: ChatSession):
+        analysis = self.query_analyzer.analyze(query)
+        query_embedding = None
+
+        if not analysis.skip_vector_search or self._uses_answer_cache(session):
+            try:
+                with metrics.QUERY_EMBEDDING_SECONDS.time():
+                    query_embedding = self.vectordb.embed_query(query)
+            except Exception as e:
+                self._embedding_failed(e, analysis)
+
+        return self._retrieve_with_embedding(query, session, analysis, query_embedding)
+
+    async def aretrieve(self, query, session: ChatSession):
+        # the embedding call is awaited on the loop, only the blocking Chroma search goes to the executor
+        analysis = self.query_analyzer.analyze(query)
+        query_embedding = None
+
+        if not analysis.skip_vector_search or self._uses_answer_cache(session):
+            try:
+                with metrics.QUERY_EMBEDDING_SECONDS.time():
+                    query_embedding = await asyncio.wait_for(
+                        self.vectordb.aembed_query(query),
+                        timeout=config.QUERY_EMBEDDING_TIMEOUT_SECONDS if self.hybrid_search_enabled else None
+                    )
+            except Exception as e:
+                self._embedding_failed(e, analysis)
+
+        loop = asyncio.get_running_loop()
+
+        return await loop.run_in_executor(
+            self.retrieval_executor, self._retrieve_with_embedding, query, session, analysis, query_embedding
         )
 
-        context = self.context_builder.build(retrieve_results_from_db)
+    def _embedding_failed(self, error: Exception, analysis: QueryAnalysis):
+        # an explicit-article query only wanted the embedding for the answer cache, it goes on without it
+        if analysis.skip_vector_search:
+            print(f"Query embedding failed ({error!r}), answering from the article index without the answer cache.")
+            return
+
+        # without the lexical index there is nothing to fall back to
+        if not self.hybrid_search_enabled:
+            raise error
+
+        metrics.RETRIEVAL_DEGRADED.inc()
+        print(f"Query embedding failed ({error!r}), falling back to lexical retrieval.")
+
+    def _retrieve_with_embedding(self, query, session: ChatSession, analysis: QueryAnalysis,
+                                 query_embedding) -> Retrieval:
+        # only first-turn queries use the answer cache
+        if not self._uses_answer_cache(session) or query_embedding is None:
+            return Retrieval(None, None, *self.retrieve_context(query, analysis, query_embedding))
+
+        cached = self.answer_cache.get(query_embedding, self._answer_cache_key(query))
+        metrics.ANSWER_CACHE_LOOKUPS.labels(result="miss" if cached is None else "hit").inc()
+
+        if cached is not None:
+            return Retrieval(query_embedding, cached.answer, None, cached.sources)
+
+        return Retrieval(query_embedding, None, *self.retrieve_context(query, analysis, query_embedding))
+
+    @staticmethod
+    def _answer_cache_key(query):
+        # questions that differ only in an article, part or paragraph number embed almost identically
+        return tuple(re.findall(r"\d+", query))
+
+    def _cache_answer(self, query, query_embedding, response, sources):
+        if query_embedding is not None:
+            self.answer_cache.put(query_embedding, response, sources, self._answer_cache_key(query))
+
+    # on_summary(fold) -> bool stores a finished history summary; by default it is applied to the
+    # session object itself. Callers that persist sessions pass one that applies it to the stored copy;
+    # on the async paths it may be a coroutine function. The async pipelines leave summarizing to the
+    # caller, which calls summarize_history once the turn is stored.
 
-        response = self.chain.invoke({
-            "context": context,
-            "query": query,
-            "chat_history": self.chat_history,
-        })
+    def run_rag_pipline(self, query, session: ChatSession, on_summary: Callable[[HistoryFold], bool] = None):
+        query_embedding, cached_answer, context, sources = self.retrieve(query, session)
 
-        self.chat_history.append(HumanMessage(content=query))
-        self.chat_history.append(AIMessage(content=response))
+        if cached_answer is not None:
+            session.add_exchange(query, cached_answer)
+            return cached_answer
 
-        if len(self.chat_history) > 10:
-            self.chat_history = self.chat_history[-10:]
+        messages, _ = self._prompt_messages(query, context, session)
+
+        with metrics.LLM_SECONDS.labels(mode="invoke").time():
+            response = self.chain.invoke(messages)
+
+        self._cache_answer(query, query_embedding, response, sources)
+        session.add_exchange(query, response)
+        self._summarize_history(session, on_summary)
 
         return response
 
-    async def stream_rag_pipeline(self, query):
-        retrieved_chunks = self.vectordb.similarity_search(
-            query,
-            self.number_of_results_to_return
-        )
+    async def arun_rag_pipline(self, query, session: ChatSession):
+        key = self._coalescing_key(query, session)
+
+        if key is None:
+            response = await self._agenerate(query, session)
+        else:
+            # shares one streamed generation with identical /query and /query/stream requests, keeps its text
+            events = self.flights.stream(key, lambda: self._generate_events(query, ChatSession()), "invoke")
+            response = "".join([data async for event, data in events if event == "token"])
+
+        session.add_exchange(query, response)
+
+        return response
+
+    async def _agenerate(self, query, session: ChatSession):
+        query_embedding, cached_answer, context, sources = await self.aretrieve(query, session)
+
+        if cached_answer is not None:
+            return cached_answer
+
+        messages, _ = self._prompt_messages(query, context, session)
+
+        with metrics.LLM_SECONDS.labels(mode="invoke").time():
+            response = await self.chain.ainvoke(messages)
+
+        self._cache_answer(query, query_embedding, response, sources)
+
+        return response
+
+    async def stream_rag_pipeline(self, query, session: ChatSession):
+        # plain token stream for the text/plain endpoint
+        async for event, data in self.stream_rag_events(query, session):
+            if event == "token":
+                yield data
+
+    async def stream_rag_events(self, query, session: ChatSession):
+        """
+        Yields ("sources", [...]) once retrieval is done, then ("token", text) frames
+        and finally ("done", {...}) with the time to first token and prompt size.
+        The exchange is in the session by the time "done" is yielded.
+        """
+        start = time.perf_counter()
+        key = self._coalescing_key(query, session)
+
+        if key is None:
+            events = self._generate_events(query, session)
+        else:
+            # every waiting client gets the frames of one shared generation, late joiners replay them
+            events = self.flights.stream(key, lambda: self._generate_events(query, ChatSession()), "stream")
+
+        cached = False
+        prompt_tokens = None
+        response_parts = []
+        time_to_first_token = None
+
+        async for event, data in events:
+            if event == "retrieved":
+                sources, cached = data
+                yield "sources", sources
+            elif event == "token":
+                if time_to_first_token is None:
+                    time_to_first_token = time.perf_counter() - start
+                    metrics.STREAM_TIME_TO_FIRST_TOKEN.labels(
+                        source="answer_cache" if cached else "llm"
+                    ).observe(time_to_first_token)
+
+                response_parts.append(data)
+                yield "token", data
+            else:
+                prompt_tokens = data
+
+        session.add_exchange(query, "".join(response_parts))
+
+        yield "done", {
+            "cached": cached,
+            "time_to_first_token_ms": None if time_to_first_token is None else round(time_to_first_token * 1000, 1),
+            "prompt_tokens": prompt_tokens,
+        }
 
-        context = self.context_builder.build(retrieved_chunks)
+    async def _generate_events(self, query, session: ChatSession):
+        # ("retrieved", (sources, cached)), then ("token", text) frames and ("prompt_tokens", count)
+        query_embedding, cached_answer, context, sources = await self.aretrieve(query, session)
 
+        yield "retrieved", (sources, cached_answer is not None)
+
+        prompt_tokens = None
+        if cached_answer is not None:
+            # replay the cached answer word by word so streaming clients behave the same
+            tokens = self._replay(cached_answer)
+        else:
+            messages, prompt_tokens = self._prompt_messages(query, context, session)
+            tokens = self._stream_llm(messages)
+
+        response_parts = []
+
+        async for text in coalesce_tokens(tokens, config.STREAM_COALESCE_SECONDS, config.STREAM_COALESCE_MAX_CHARS):
+            response_parts.append(text)
+            yield "token", text
+
+        if cached_answer is None:
+            self._cache_answer(query, query_embedding, "".join(response_parts), sources)
+
+        yield "prompt_tokens", prompt_tokens
+
+    def _coalescing_key(self, query, session: ChatSession):
+        # only first-turn answers are the same for everyone asking the same question
+        if not self.coalescing_enabled or session.has_history():
+            return None
+
+        return QueryEmbeddingCache.normalize(query), self.index_version
+
+    def _prompt_messages(self, query, context, session: ChatSession):
+        chat_history = self.history_manager.prompt_history(session)
         messages = self.prompt.format_messages(
             context=context,
             query=query,
-            chat_history=self.chat_history
+            chat_history=chat_history
         )
+        prompt_tokens = self.token_counter.count_messages(messages)
+        metrics.PROMPT_TOKENS.observe(prompt_tokens)
+        metrics.HISTORY_TOKENS.observe(self.token_counter.count_messages(chat_history))
+
+        return messages, prompt_tokens
+
+    def _summarize_history(self, session: ChatSession, on_summary=None):
+        messages = self.history_manager.pending_fold(session)
+        if messages is not None:
+            self.summary_executor.submit(self._run_summary, messages, session.summary, session, on_summary)
+
+    def summarize_history(self, session: ChatSession, on_summary=None):
+        # async paths: starts a task that folds the turns that fell out of the history budget
+        messages = self.history_manager.pending_fold(session)
+        if messages is not None:
+            task = asyncio.create_task(self._arun_summary(messages, session.summary, session, on_summary))
+            self.summary_tasks.add(task)
+            task.add_done_callback(self.summary_tasks.discard)
+
+    def _run_summary(self, messages, previous_summary, session: ChatSession, on_summary):
+        try:
+            with metrics.HISTORY_SUMMARY_SECONDS.time():
+                fold = self.history_manager.summarize(messages, previous_summary)
+        except Exception as e:
+            self._summary_failed(e)
+            return
+
+        self._store_summary(fold, session, on_summary)
+
+    async def _arun_summary(self, messages, previous_summary, session: ChatSession, on_summary):
+        try:
+            with metrics.HISTORY_SUMMARY_SECONDS.time():
+                fold = await self.history_manager.asummarize(messages, previous_summary)
+        except Exception as e:
+            self._summary_failed(e)
+            return
+
+        applied = (on_summary or session.apply_summary)(fold)
+        if inspect.isawaitable(applied):
+            applied = await applied
+        metrics.HISTORY_SUMMARIES.labels(result="applied" if applied else "stale").inc()
+
+    @staticmethod
+    def _store_summary(fold: HistoryFold, session: ChatSession, on_summary):
+        applied = (on_summary or session.apply_summary)(fold)
+        metrics.HISTORY_SUMMARIES.labels(result="applied" if applied else "stale").inc()
+
+    @staticmethod
+    def _summary_failed(error: Exception):
+        # the turns stay in the session and are summarized again after the next response
+        metrics.HISTORY_SUMMARIES.labels(result="failed").inc()
+        print(f"History summary failed ({error!r}), retrying after the next response.")
+
+    async def _stream_llm(self, messages):
+        start = time.perf_counter()
+        first_token = True
+
+        async for chunk in self.llm_stream.astream(messages):
+            if first_token and chunk.content:
+                first_token = False
+                metrics.LLM_TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - start)
+            yield chunk.content
+
+        metrics.LLM_SECONDS.labels(mode="stream").observe(time.perf_counter() - start)
+
+    @staticmethod
+    async def _replay(answer):
+        for token in re.findall(r"\S+\s*", answer):
+            yield token
 
-        full_response = ""
-        async for chunk in self.llm.astream(messages):
-            content = chunk.content
-            full_response += content
-            yield content
+    def reload_index(self):
+        # called after re-ingestion so context expansion and lexical search see the new edition
+        self.vectordb.reload_vectors()
+        self.chunk_index.load(self.vectordb)
 
-        self.chat_history.append(HumanMessage(content=query))
-        self.chat_history.append(AIMessage(content=full_response))
+        if self.hybrid_search_enabled:
+            self.vectordb.load_lexical_index()
 
-        if len(self.chat_history) > 10:
-            self.chat_history = self.chat_history[-10:]
+        # answers built from the previous edition must not be served any more
+        self.index_version += 1
+        if self.answer_cache is not None:
+            self.answer_cache.clear()
 
-    def clear_history(self):
-        self.chat_history = []
+    async def aclose(self):
+        for task in self.summary_tasks:
+            task.cancel()
+        self.summary_executor.shutdown(wait=False, cancel_futures=True)
+        self.retrieval_executor.shutdown(wait=False, cancel_futures=True)
+        self.http_client.close()
+        await self.http_async_client.aclose()
 
 
 if __name__ == "__main__":
-    # python -m rag.rag_pipeline
+    # python -m backend.rag.rag_pipeline
 
     rag_pipline = RAGPipline()
-    result = rag_pipline.run_rag_pipline("покарання за крадіжку")
+    result = rag_pipline.run_rag_pipline("покарання за крадіжку", ChatSession())
 
     print(result)
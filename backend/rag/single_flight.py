@@ -0,0 +1,100 @@
+import asyncio
+from typing import AsyncIterator, Callable, Dict, Hashable
+
+from backend import metrics
+
+
+class _Flight:
+    # events of one running producer, kept so subscribers that join late replay them from the start
+
+    def __init__(self):
+        self.events = []
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+        self.task = None
+        self._changed = asyncio.Event()
+
+    def publish(self, event):
+        self.events.append(event)
+        self._notify()
+
+    def finish(self, error: Exception = None):
+        self.done = True
+        self.error = error
+        self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self):
+        position = 0
+
+        while True:
+            while position < len(self.events):
+                yield self.events[position]
+                position += 1
+
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+
+            await self._changed.wait()
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one producer. The first caller starts it
+    in a task of its own; every caller, the first included, receives its events as they are
+    produced. The key is released when the producer ends, so later calls start a fresh one, and
+    the producer is cancelled if every caller goes away before it is done. mode only labels the
+    metrics, callers of different modes with the same key share one producer.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+
+        metrics.COALESCING_IN_FLIGHT.set_function(self.in_flight)
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def stream(self, key: Hashable, produce: Callable[[], AsyncIterator], mode: str) -> AsyncIterator:
+        flight = self._flights.get(key)
+
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._run(key, flight, produce()))
+            role = "leader"
+        else:
+            role = "follower"
+
+        metrics.COALESCED_REQUESTS.labels(mode=mode, role=role).inc()
+        flight.subscribers += 1
+
+        try:
+            async for event in flight.subscribe():
+                yield event
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                self._release(key, flight)
+                flight.task.cancel()
+
+    async def _run(self, key: Hashable, flight: _Flight, events: AsyncIterator):
+        try:
+            async for event in events:
+                flight.publish(event)
+        except Exception as e:
+            flight.finish(e)
+        else:
+            flight.finish()
+        finally:
+            self._release(key, flight)
+
+    def _release(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
@@ -0,0 +1,76 @@
+import asyncio
+import json
+from typing import AsyncIterator
+
+_END = object()
+
+
+async def coalesce_tokens(tokens: AsyncIterator[str], window_seconds: float, max_chars: int) -> AsyncIterator[str]:
+    """
+    Merges small LLM tokens into frames: the first token is sent immediately,
+    later ones are buffered for at most window_seconds or max_chars.
+    """
+    if window_seconds <= 0:
+        async for token in tokens:
+            yield token
+        return
+
+    # a producer task feeds a queue so a stalled model cannot hold back an already buffered frame
+    queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async for token in tokens:
+                queue.put_nowait(token)
+            queue.put_nowait(_END)
+        except Exception as e:
+            queue.put_nowait(e)
+
+    loop = asyncio.get_running_loop()
+    task = asyncio.create_task(pump())
+
+    try:
+        first = True
+        buffer = []
+        buffered_chars = 0
+        deadline = 0.0
+
+        while True:
+            try:
+                timeout = max(deadline - loop.time(), 0) if buffer else None
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield "".join(buffer)
+                buffer, buffered_chars = [], 0
+                continue
+
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            if not item:
+                continue
+
+            if first:
+                first = False
+                yield item
+                continue
+
+            if not buffer:
+                deadline = loop.time() + window_seconds
+            buffer.append(item)
+            buffered_chars += len(item)
+
+            if buffered_chars >= max_chars:
+                yield "".join(buffer)
+                buffer, buffered_chars = [], 0
+
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        task.cancel()
+
+
+def format_sse(event: str, data) -> str:
+    # data is JSON so newlines inside tokens never break the event framing
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
@@ -0,0 +1,58 @@
+import re
+from typing import Iterable
+
+from langchain_core.messages import BaseMessage
+
+
+class TokenCounter:
+    """
+    Counts prompt tokens with tiktoken. When the encoding cannot be loaded
+    (no network on first use, unknown model) it falls back to an estimate
+    of one token per word piece, which is close for Ukrainian text.
+    """
+
+    FALLBACK_PATTERN = re.compile(r"\w{1,4}|[^\w\s]")
+    MESSAGE_OVERHEAD_TOKENS = 4  # role and separators added per chat message
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.encoding = self._load_encoding(model_name)
+
+    @staticmethod
+    def _load_encoding(model_name: str):
+        try:
+            import tiktoken
+
+            try:
+                return tiktoken.encoding_for_model(model_name)
+            except KeyError:
+                return tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            print(f"tiktoken encoding unavailable ({type(e).__name__}), estimating token counts.")
+            return None
+
+    def count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+
+        return len(self.FALLBACK_PATTERN.findall(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        # longest prefix of text that fits in max_tokens
+        if max_tokens <= 0:
+            return ""
+
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            if len(tokens) <= max_tokens:
+                return text
+            return self.encoding.decode(tokens[:max_tokens])
+
+        for i, match in enumerate(self.FALLBACK_PATTERN.finditer(text), 1):
+            if i == max_tokens:
+                return text[:match.end()]
+
+        return text
+
+    def count_messages(self, messages: Iterable[BaseMessage]) -> int:
+        return sum(self.count(message.content) + self.MESSAGE_OVERHEAD_TOKENS for message in messages)
@@ -0,0 +1,28 @@
+import config
+from .memory_session_store import InMemorySessionStore
+from .session_store import SessionStore
+from .sqlite_session_store import SqliteSessionStore
+
+
+def create_session_store() -> SessionStore:
+    if config.SESSION_BACKEND == "sqlite":
+        return SqliteSessionStore(
+            path=config.SESSION_SQLITE_PATH,
+            ttl_seconds=config.SESSION_TTL_SECONDS,
+            max_sessions=config.SESSION_MAX_SESSIONS,
+            max_workers=config.SESSION_STORE_MAX_WORKERS,
+        )
+
+    return InMemorySessionStore(
+        ttl_seconds=config.SESSION_TTL_SECONDS,
+        max_sessions=config.SESSION_MAX_SESSIONS,
+        max_bytes=config.SESSION_MAX_BYTES,
+    )
+
+
+__all__ = [
+    "SessionStore",
+    "InMemorySessionStore",
+    "SqliteSessionStore",
+    "create_session_store",
+]
@@ -0,0 +1,102 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from backend.sessions.session_store import SessionStore
+
+
+class InMemorySessionStore(SessionStore):
+    # single-process store: LRU order doubles as idle order, so expired sessions are always at the front
+
+    def __init__(self, ttl_seconds: float, max_sessions: int, max_bytes: int):
+        super().__init__(ttl_seconds, max_sessions)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+
+        self._sessions = OrderedDict()  # session_id -> (last_access, serialized history, size in bytes, version)
+        self._lock = threading.Lock()
+        # store-wide, so a session deleted and created again never repeats a version
+        self._versions = itertools.count()
+
+    def _load(self, session_id: str) -> Optional[Tuple[str, int]]:
+        with self._lock:
+            self._evict_expired()
+
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+
+            self._sessions[session_id] = (time.monotonic(), entry[1], entry[2], entry[3])
+            self._sessions.move_to_end(session_id)
+
+            return entry[1], entry[3]
+
+    def _store(self, session_id: str, data: str):
+        with self._lock:
+            self._put(session_id, data)
+
+    def _store_if_version(self, session_id: str, data: str, version: int) -> bool:
+        with self._lock:
+            self._evict_expired()
+
+            previous = self._sessions.get(session_id)
+            if previous is None or previous[3] != version:
+                return False
+
+            self._put(session_id, data)
+            return True
+
+    def _put(self, session_id: str, data: str):
+        # called with the lock held
+        previous = self._sessions.pop(session_id, None)
+        if previous is not None:
+            self.total_bytes -= previous[2]
+
+        # max_bytes is in UTF-8 bytes; Cyrillic history takes two per character
+        size = len(data.encode("utf-8"))
+        self._sessions[session_id] = (time.monotonic(), data, size, next(self._versions))
+        self.total_bytes += size
+
+        self._evict_expired()
+        while len(self._sessions) > 1 and (
+                len(self._sessions) > self.max_sessions or self.total_bytes > self.max_bytes
+        ):
+            self._pop_oldest()
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            if entry is None:
+                return False
+
+            self.total_bytes -= entry[2]
+            return True
+
+    def size(self) -> int:
+        # idle sessions past the TTL do not count as active, same as the SQLite store
+        with self._lock:
+            self._evict_expired()
+
+            return len(self._sessions)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["stored_bytes"] = self.total_bytes
+
+        return stats
+
+    def _evict_expired(self):
+        deadline = time.monotonic() - self.ttl_seconds
+
+        while self._sessions:
+            last_access = next(iter(self._sessions.values()))[0]
+            if last_access >= deadline:
+                break
+            self._pop_oldest()
+
+    def _pop_oldest(self):
+        _, (_, _, size, _) = self._sessions.popitem(last=False)
+        self.total_bytes -= size
+        self.evictions += 1
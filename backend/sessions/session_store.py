@@ -0,0 +1,100 @@
+import asyncio
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from backend.rag.chat_session import ChatSession
+
+
+class SessionStore(ABC):
+    """
+    Keeps serialized chat history per session id. Backends evict sessions that were
+    idle longer than ttl_seconds and the least recently used ones above max_sessions.
+    Async handlers use the a* methods; backends doing blocking I/O set an executor so
+    those calls run off the event loop. Every write bumps a per-session version, which
+    apply_summary compares before writing back.
+    """
+
+    def __init__(self, ttl_seconds: float, max_sessions: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.evictions = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        entry = self._load(session_id)
+
+        return ChatSession.from_json(entry[0]) if entry is not None else None
+
+    def save(self, session_id: str, session: ChatSession):
+        self._store(session_id, session.to_json())
+
+    def apply_summary(self, session_id: str, fold) -> bool:
+        # compare-and-swap: a write from another request or worker between the read and the
+        # write back changes the version, the write back is refused and the fold is re-applied
+        while True:
+            entry = self._load(session_id)
+            if entry is None:
+                return False
+
+            data, version = entry
+            session = ChatSession.from_json(data)
+            if not session.apply_summary(fold):
+                return False
+
+            if self._store_if_version(session_id, session.to_json(), version):
+                return True
+
+    @abstractmethod
+    def _load(self, session_id: str) -> Optional[Tuple[str, int]]:
+        # (serialized session, version)
+        ...
+
+    @abstractmethod
+    def _store(self, session_id: str, data: str):
+        ...
+
+    @abstractmethod
+    def _store_if_version(self, session_id: str, data: str, version: int) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def size(self) -> int:
+        ...
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self).__name__,
+            "active_sessions": self.size(),
+            "evicted_sessions": self.evictions,
+        }
+
+    async def aget(self, session_id: str) -> Optional[ChatSession]:
+        return await self._run(self.get, session_id)
+
+    async def asave(self, session_id: str, session: ChatSession):
+        # serialized on the caller's side, the session object may change once this returns
+        await self._run(self._store, session_id, session.to_json())
+
+    async def aapply_summary(self, session_id: str, fold) -> bool:
+        return await self._run(self.apply_summary, session_id, fold)
+
+    async def adelete(self, session_id: str) -> bool:
+        return await self._run(self.delete, session_id)
+
+    async def astats(self) -> dict:
+        return await self._run(self.stats)
+
+    async def _run(self, function, *args):
+        if self._executor is None:
+            return function(*args)
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
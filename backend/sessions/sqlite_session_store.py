@@ -0,0 +1,117 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from backend.sessions.session_store import SessionStore
+
+
+class SqliteSessionStore(SessionStore):
+    # one SQLite file shared by every uvicorn worker on the host; survives restarts
+
+    def __init__(self, path: str, ttl_seconds: float, max_sessions: int, max_workers: int = 4):
+        super().__init__(ttl_seconds, max_sessions)
+        self.path = path
+
+        # queries may wait up to the busy timeout on another worker's write, never on the event loop
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sessions")
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, last_access REAL NOT NULL, "
+            "version INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(sessions)")]
+        if "version" not in columns:  # files created before apply_summary compared versions
+            self._connection.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access)"
+        )
+        self._connection.commit()
+
+    def _load(self, session_id: str) -> Optional[Tuple[str, int]]:
+        now = time.time()
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data, version FROM sessions WHERE session_id = ? AND last_access >= ?",
+                (session_id, now - self.ttl_seconds)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            self._connection.execute(
+                "UPDATE sessions SET last_access = ? WHERE session_id = ?", (now, session_id)
+            )
+            self._connection.commit()
+
+            return row[0], row[1]
+
+    def _store(self, session_id: str, data: str):
+        now = time.time()
+
+        with self._lock:
+            # a new row starts its version from the clock, so a session deleted and created again
+            # by another worker never repeats a version an in-flight apply_summary has read
+            self._connection.execute(
+                "INSERT INTO sessions (session_id, data, last_access, version) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (session_id) DO UPDATE SET "
+                "data = excluded.data, last_access = excluded.last_access, version = version + 1",
+                (session_id, data, now, time.time_ns())
+            )
+
+            expired = self._connection.execute(
+                "DELETE FROM sessions WHERE last_access < ?", (now - self.ttl_seconds,)
+            ).rowcount
+            overflow = self._connection.execute(
+                "DELETE FROM sessions WHERE session_id IN ("
+                "SELECT session_id FROM sessions ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,)
+            ).rowcount
+            self._connection.commit()
+
+            self.evictions += expired + overflow
+
+    def _store_if_version(self, session_id: str, data: str, version: int) -> bool:
+        now = time.time()
+
+        # the version check and the write are one statement, atomic across workers
+        with self._lock:
+            updated = self._connection.execute(
+                "UPDATE sessions SET data = ?, last_access = ?, version = version + 1 "
+                "WHERE session_id = ? AND version = ? AND last_access >= ?",
+                (data, now, session_id, version, now - self.ttl_seconds)
+            ).rowcount
+            self._connection.commit()
+
+        return updated > 0
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            deleted = self._connection.execute(
+                "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+            ).rowcount
+            self._connection.commit()
+
+        return deleted > 0
+
+    def size(self) -> int:
+        # expired rows are only deleted on the next write, they do not count as active
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM sessions WHERE last_access >= ?", (time.time() - self.ttl_seconds,)
+            ).fetchone()[0]
+
+    def close(self):
+        super().close()
+        self._connection.close()
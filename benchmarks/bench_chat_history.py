@@ -0,0 +1,145 @@
+"""
+Prompt size and answer latency over multi-turn conversations: the fixed
+10-message history against HistoryManager (recent turns within a token
+budget plus a rolling summary written after the response). Concurrent
+conversations replay the offline query corpus through
+RAGPipline.arun_rag_pipline on a synthetic collection, with a think time
+between turns. The fake chat model gives long answers and charges
+prompt_char_latency per prompt character.
+
+fixed:  MAX_HISTORY_MESSAGES = 10, every kept message verbatim
+N:      HistoryManager.token_budget = N, older turns summarized in the background
+
+python -m benchmarks.bench_chat_history --budgets fixed 1500 --conversations 4 --turns 10
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.queries import load_queries, DEFAULT_QUERIES_PATH
+from benchmarks.utils import use_offline_settings
+
+
+async def converse(pipeline, session, queries, think_time, latencies):
+    for turn, query in enumerate(queries):
+        start = time.perf_counter()
+        await pipeline.arun_rag_pipline(query, session)
+        latencies[turn].append(time.perf_counter() - start)
+        pipeline.summarize_history(session)
+
+        # the user reads the answer, background summaries land meanwhile
+        await asyncio.sleep(think_time)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budgets", nargs="+", default=["fixed", "1500"])
+    parser.add_argument("--queries", default=DEFAULT_QUERIES_PATH, help="jsonl file with a 'query' field")
+    parser.add_argument("--articles", type=int, default=100, help="synthetic articles in the seeded collection")
+    parser.add_argument("--conversations", type=int, default=4)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--think-time", type=float, default=0.5, help="seconds between a response and the next query")
+    parser.add_argument("--answer-repeat", type=int, default=12, help="fake answer length in FAKE_ANSWER copies")
+    parser.add_argument("--chat-latency", type=float, default=0.2)
+    parser.add_argument("--prompt-char-latency", type=float, default=0.00005, help="seconds per prompt character")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+
+    with tempfile.TemporaryDirectory() as persist_dir:
+        use_offline_settings(persist_dir)
+
+        import config
+        from backend import metrics
+        from backend.rag.chat_session import ChatSession
+        from backend.rag.rag_pipeline import RAGPipline
+        from benchmarks.corpus import seed_collection
+        from benchmarks.fakes import FAKE_ANSWER, FakeChatModel, FakeEmbeddings
+        from ml.embedder import Embedder
+        from vector_db import VectorDB
+
+        config.EMBEDDER = FakeEmbeddings(request_latency=0, per_text_latency=0)
+        config.ANSWER_CACHE_ENABLED = False
+        # a coalesced first turn is generated on a throwaway session, prompt sizes are recorded per session
+        config.REQUEST_COALESCING_ENABLED = False
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            seed_collection(
+                VectorDB(backend="chroma"),
+                Embedder(config.EMBEDDER, config.MAX_CHUNKS_TOKENS, "bench", "bench.pdf"),
+                n_articles=args.articles,
+            )
+            pipeline = RAGPipline(llm=FakeChatModel(
+                latency=args.chat_latency,
+                prompt_char_latency=args.prompt_char_latency,
+                answer=" ".join([FAKE_ANSWER] * args.answer_repeat),
+            ))
+
+        prompt_messages = pipeline._prompt_messages
+        prompt_tokens = {}
+
+        def recording_prompt_messages(query, context, session):
+            messages, tokens = prompt_messages(query, context, session)
+            prompt_tokens.setdefault(id(session), []).append(tokens)
+            return messages, tokens
+
+        pipeline._prompt_messages = recording_prompt_messages
+        encoding = "tiktoken" if pipeline.token_counter.encoding is not None else "estimated"
+        print(
+            f"{args.conversations} conversations x {args.turns} turns, {args.articles} synthetic articles, "
+            f"{encoding} token counts"
+        )
+
+        def applied_summaries():
+            return metrics.HISTORY_SUMMARIES.labels(result="applied")._value.get()
+
+        async def run(budget):
+            sessions = [ChatSession() for _ in range(args.conversations)]
+            for session in sessions:
+                session.max_history_messages = 10 if budget == "fixed" else config.MAX_HISTORY_MESSAGES
+            pipeline.history_manager.token_budget = None if budget == "fixed" else int(budget)
+
+            latencies = [[] for _ in range(args.turns)]
+            prompt_tokens.clear()
+            summaries_before = applied_summaries()
+
+            await asyncio.gather(*(
+                converse(
+                    pipeline, session,
+                    [queries[(i * args.turns + turn) % len(queries)] for turn in range(args.turns)],
+                    args.think_time, latencies
+                )
+                for i, session in enumerate(sessions)
+            ))
+
+            per_turn = list(zip(*prompt_tokens.values()))
+            print(f"history {budget:>5}: {applied_summaries() - summaries_before:.0f} summaries applied")
+            for turn in range(args.turns):
+                print(
+                    f"  turn {turn + 1:2d}: prompt tokens mean {np.mean(per_turn[turn]):7.0f}  "
+                    f"latency p50 {np.percentile(latencies[turn], 50) * 1000:7.1f} ms"
+                )
+
+            all_tokens = [tokens for turns in prompt_tokens.values() for tokens in turns]
+            all_latencies = [latency for turn in latencies for latency in turn]
+            print(
+                f"  all    : prompt tokens mean {np.mean(all_tokens):7.0f} max {max(all_tokens):7d}  "
+                f"latency p50 {np.percentile(all_latencies, 50) * 1000:7.1f} ms "
+                f"p95 {np.percentile(all_latencies, 95) * 1000:7.1f} ms"
+            )
+
+        async def run_all():
+            for budget in args.budgets:
+                await run(budget)
+            await pipeline.aclose()
+
+        asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Bursts of identical first-turn queries with and without request coalescing.
+Each burst sends --clients concurrent requests for the same question through
+RAGPipline.stream_rag_events (or arun_rag_pipline with --mode invoke, or
+alternating between the two with --mode mixed); the bursts cycle through --hot-queries questions of the offline corpus. Reports
+chat model calls, embedding requests, time to first token and latency.
+
+The answer cache is off so every burst reaches retrieval and the model;
+with it on, only the first burst of each question does, and that burst is
+exactly what coalescing collapses.
+
+python -m benchmarks.bench_coalescing --clients 32 --bursts 6
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.queries import load_queries, DEFAULT_QUERIES_PATH
+from benchmarks.utils import use_offline_settings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["stream", "invoke", "mixed"], default="stream")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES_PATH, help="jsonl file with a 'query' field")
+    parser.add_argument("--articles", type=int, default=100, help="synthetic articles in the seeded collection")
+    parser.add_argument("--clients", type=int, default=32, help="concurrent identical requests per burst")
+    parser.add_argument("--bursts", type=int, default=6)
+    parser.add_argument("--hot-queries", type=int, default=3)
+    parser.add_argument("--spread", type=float, default=0.2, help="seconds over which a burst's requests arrive")
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    parser.add_argument("--chat-latency", type=float, default=0.5)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)[:args.hot_queries]
+
+    with tempfile.TemporaryDirectory() as persist_dir:
+        use_offline_settings(persist_dir)
+
+        import config
+        from backend.rag.chat_session import ChatSession
+        from backend.rag.rag_pipeline import RAGPipline
+        from benchmarks.corpus import seed_collection
+        from benchmarks.fakes import FakeChatModel, FakeEmbeddings
+        from ml.embedder import Embedder
+        from vector_db import VectorDB
+
+        config.EMBEDDER = FakeEmbeddings(request_latency=0, per_text_latency=0)
+        config.ANSWER_CACHE_ENABLED = False
+        config.QUERY_EMBEDDING_CACHE_MAX_ENTRIES = 0
+
+        chat = FakeChatModel(latency=args.chat_latency, token_delay=args.token_delay)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            seed_collection(
+                VectorDB(backend="chroma"),
+                Embedder(config.EMBEDDER, config.MAX_CHUNKS_TOKENS, "bench", "bench.pdf"),
+                n_articles=args.articles,
+            )
+            pipeline = RAGPipline(llm=chat, llm_stream=chat)
+
+        # query embeddings from here on pay the API latency
+        embedder = FakeEmbeddings(request_latency=args.embedding_latency, per_text_latency=0)
+        config.EMBEDDER = embedder
+
+        async def request(query, index, delay, ttfts, latencies):
+            await asyncio.sleep(delay)
+            start = time.perf_counter()
+
+            if args.mode == "invoke" or (args.mode == "mixed" and index % 2):
+                await pipeline.arun_rag_pipline(query, ChatSession())
+            else:
+                first_token = True
+                async for event, _ in pipeline.stream_rag_events(query, ChatSession()):
+                    if event == "token" and first_token:
+                        first_token = False
+                        ttfts.append(time.perf_counter() - start)
+
+            latencies.append(time.perf_counter() - start)
+
+        async def run(enabled):
+            pipeline.coalescing_enabled = enabled
+            chat.calls = 0
+            embedder.requests = 0
+            ttfts, latencies = [], []
+
+            start = time.perf_counter()
+            for burst in range(args.bursts):
+                query = queries[burst % len(queries)]
+                delays = np.linspace(0, args.spread, args.clients)
+                await asyncio.gather(*(
+                    request(query, index, delay, ttfts, latencies) for index, delay in enumerate(delays)
+                ))
+            elapsed = time.perf_counter() - start
+
+            label = "on " if enabled else "off"
+            total = args.bursts * args.clients
+            line = (
+                f"coalescing {label}: {total} requests, {chat.calls:4d} chat calls, {embedder.requests:4d} embedding "
+                f"requests, latency p50 {np.percentile(latencies, 50) * 1000:7.1f} ms "
+                f"p95 {np.percentile(latencies, 95) * 1000:7.1f} ms"
+            )
+            if ttfts:
+                line += (
+                    f", first token p50 {np.percentile(ttfts, 50) * 1000:7.1f} ms "
+                    f"p95 {np.percentile(ttfts, 95) * 1000:7.1f} ms"
+                )
+            print(f"{line}, {elapsed:.1f} s")
+
+        async def run_all():
+            print(
+                f"{args.mode}: {args.bursts} bursts of {args.clients} identical requests over {args.spread}s, "
+                f"{len(queries)} hot queries"
+            )
+            await run(False)
+            await run(True)
+            await pipeline.aclose()
+
+        asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
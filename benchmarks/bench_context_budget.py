@@ -0,0 +1,90 @@
+"""
+Prompt size and answer latency versus the context token budget, replaying the
+offline query corpus through RAGPipline.run_rag_pipline on a synthetic
+collection. The fake chat model charges prompt_char_latency per prompt
+character on top of its fixed latency, standing in for prefill time.
+
+none: no budget, every expanded article and section window goes in
+N:    ContextBuilder.token_budget = N
+
+python -m benchmarks.bench_context_budget --budgets none 4000 2000 1000
+"""
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.queries import load_queries, DEFAULT_QUERIES_PATH
+from benchmarks.utils import use_offline_settings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budgets", nargs="+", default=["none", "4000", "2000", "1000"])
+    parser.add_argument("--queries", default=DEFAULT_QUERIES_PATH, help="jsonl file with a 'query' field")
+    parser.add_argument("--articles", type=int, default=400, help="synthetic articles in the seeded collection")
+    parser.add_argument("--chat-latency", type=float, default=0.2)
+    parser.add_argument("--prompt-char-latency", type=float, default=0.00005, help="seconds per prompt character")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+
+    with tempfile.TemporaryDirectory() as persist_dir:
+        use_offline_settings(persist_dir)
+
+        import config
+        from backend.rag.chat_session import ChatSession
+        from backend.rag.rag_pipeline import RAGPipline
+        from benchmarks.corpus import seed_collection
+        from benchmarks.fakes import FakeChatModel, FakeEmbeddings
+        from ml.embedder import Embedder
+        from vector_db import VectorDB
+
+        config.EMBEDDER = FakeEmbeddings(request_latency=0, per_text_latency=0)
+        config.ANSWER_CACHE_ENABLED = False
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            seed_collection(
+                VectorDB(backend="chroma"),
+                Embedder(config.EMBEDDER, config.MAX_CHUNKS_TOKENS, "bench", "bench.pdf"),
+                n_articles=args.articles,
+            )
+            pipeline = RAGPipline(
+                llm=FakeChatModel(latency=args.chat_latency, prompt_char_latency=args.prompt_char_latency)
+            )
+
+        prompt_messages = pipeline._prompt_messages
+        prompt_tokens = []
+
+        def recording_prompt_messages(*a, **kw):
+            messages, tokens = prompt_messages(*a, **kw)
+            prompt_tokens.append(tokens)
+            return messages, tokens
+
+        pipeline._prompt_messages = recording_prompt_messages
+        encoding = "tiktoken" if pipeline.token_counter.encoding is not None else "estimated"
+        print(f"{len(queries)} queries, {args.articles} synthetic articles, {encoding} token counts")
+
+        for budget in args.budgets:
+            pipeline.context_builder.token_budget = None if budget == "none" else int(budget)
+            prompt_tokens.clear()
+            latencies = []
+
+            for query in queries:
+                start = time.perf_counter()
+                pipeline.run_rag_pipline(query, ChatSession())
+                latencies.append(time.perf_counter() - start)
+
+            p50, p95 = (np.percentile(latencies, q) * 1000 for q in (50, 95))
+            print(
+                f"budget {budget:>5}: prompt tokens mean {np.mean(prompt_tokens):7.0f} "
+                f"p95 {np.percentile(prompt_tokens, 95):7.0f} max {max(prompt_tokens):7d}  "
+                f"latency p50 {p50:7.1f} ms p95 {p95:7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
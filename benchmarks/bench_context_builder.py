@@ -0,0 +1,133 @@
+"""
+ContextBuilder.build latency and Chroma round-trips versus k, on a synthetic
+collection in a temporary Chroma directory.
+
+before: the previous builder, one _collection.get per multi-chunk hit
+after:  ContextBuilder without an index, one batched get per build
+index:  ContextBuilder with the in-memory ChunkIndex, no Chroma lookups
+
+python -m benchmarks.bench_context_builder --ks 1 5 10 20
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from benchmarks.utils import use_offline_settings
+
+
+class CountingCollection:
+    def __init__(self, collection):
+        self._collection = collection
+        self.get_calls = 0
+
+    def get(self, *args, **kwargs):
+        self.get_calls += 1
+        return self._collection.get(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+
+class LegacyContextBuilder:
+    # reference copy of the per-hit implementation this benchmark compares against
+
+    def __init__(self, vectordb):
+        self.vectordb = vectordb
+
+    def build(self, retrieved_chunks):
+        all_context = []
+        for chunk in retrieved_chunks:
+            metadata = chunk.metadata
+            if "article_num" in metadata:
+                context = self._build_article_context(chunk)
+            elif "section" in metadata and metadata.get("part") == "ПРИКІНЦЕВІ ТА ПЕРЕХІДНІ ПОЛОЖЕННЯ":
+                context = self._build_section_context(chunk)
+            else:
+                context = chunk.page_content
+            all_context.append(context)
+
+        return "\n".join(all_context).strip()
+
+    def _build_article_context(self, chunk):
+        metadata = chunk.metadata
+        if metadata.get("total_chunks", 1) == 1:
+            return f"{metadata['part']}. {metadata['section']}. {chunk.page_content}"
+
+        data = self.vectordb.vectordb._collection.get(where={"article_num": metadata["article_num"]})
+        sorted_chunks = sorted(zip(data["documents"], data["metadatas"]), key=lambda x: x[1].get("chunk_index", 0))
+        result = " ".join(doc for doc, _ in sorted_chunks).strip()
+
+        return f"{metadata['part']}. {metadata['section']}. {result}"
+
+    def _build_section_context(self, chunk):
+        metadata = chunk.metadata
+        idx = metadata.get("chunk_index", 0)
+        neighbors = {i for i in (idx - 1, idx, idx + 1) if 0 <= i < metadata.get("total_chunks", 1)}
+
+        # the original passed {"section": ..., "part": ...}, which current Chroma rejects
+        data = self.vectordb.vectordb._collection.get(
+            where={"$and": [{"section": metadata["section"]}, {"part": metadata["part"]}]}
+        )
+        merged = sorted(
+            (meta["chunk_index"], doc)
+            for doc, meta in zip(data["documents"], data["metadatas"])
+            if meta.get("chunk_index") in neighbors
+        )
+
+        return f"{metadata['part']}. {metadata['section']}. " + " ".join(doc for _, doc in merged).strip()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ks", type=int, nargs="+", default=[1, 5, 10, 20])
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as persist_dir:
+        use_offline_settings(persist_dir)
+
+        import config
+        from langchain_core.documents import Document
+
+        from backend.rag.context_builder import ContextBuilder
+        from chunk_index import ChunkIndex
+        from benchmarks.corpus import seed_collection
+        from benchmarks.fakes import FakeEmbeddings
+        from ml.embedder import Embedder
+        from vector_db import VectorDB
+
+        config.EMBEDDER = FakeEmbeddings(request_latency=0, per_text_latency=0, dimensions=64)
+        vectordb = VectorDB()
+        entries = seed_collection(vectordb, Embedder(config.EMBEDDER, config.MAX_CHUNKS_TOKENS, "bench", "bench.pdf"))
+
+        counter = CountingCollection(vectordb.vectordb._collection)
+        vectordb.vectordb._chroma_collection = counter
+        builders = {
+            "before": LegacyContextBuilder(vectordb),
+            "after": ContextBuilder(vectordb),
+            "index": ContextBuilder(vectordb, ChunkIndex().load(vectordb)),
+        }
+        rng = random.Random(1)
+
+        for k in args.ks:
+            hit_sets = [
+                [Document(page_content=e["page_content"], metadata=e["metadata"]) for e in rng.sample(entries, k)]
+                for _ in range(args.repeats)
+            ]
+
+            for label, builder in builders.items():
+                counter.get_calls = 0
+                start = time.perf_counter()
+                sizes = [len(builder.build(hits)) for hits in hit_sets]
+                elapsed = time.perf_counter() - start
+
+                print(
+                    f"k={k:<3} {label:>6}: {elapsed / args.repeats * 1000:7.2f} ms/build, "
+                    f"{counter.get_calls / args.repeats:5.1f} gets/build, "
+                    f"{sum(sizes) / len(sizes):8.0f} chars of context"
+                )
+
+
+if __name__ == "__main__":
+    main()
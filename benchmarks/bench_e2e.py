@@ -0,0 +1,273 @@
+"""
+Offline end-to-end benchmark: local fake embedding and chat models with
+configurable latency, a seeded temporary collection, and drivers for
+/query, /query/stream (SSE, client-side time to first token) and
+IngestionPipeline.process_pdf. Reports p50/p95/p99 latency, throughput
+and memory for every concurrency level.
+
+The API runs under uvicorn on a local port so streaming is measured over a
+real connection. Queries are replayed round-robin from a jsonl file with a
+"query" field (benchmarks/data/queries.jsonl by default).
+
+python -m benchmarks.bench_e2e --scenarios query stream --levels 1 8 32 --requests 128
+python -m benchmarks.bench_e2e --scenarios ingest --ingest-workers 1 4 8
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from functools import partial
+
+import numpy as np
+
+from benchmarks.queries import load_queries, DEFAULT_QUERIES_PATH
+from benchmarks.utils import use_offline_settings, current_rss_mb
+
+ML_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml")
+PDF_PATH = os.path.join(ML_DIR, "data", "criminal_code_of_ukraine.pdf")
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def report(label: str, latencies, elapsed: float, extra: str = ""):
+    p50, p95, p99 = (np.percentile(latencies, q) * 1000 for q in (50, 95, 99))
+    print(
+        f"{label:<28} p50 {p50:7.1f} ms  p95 {p95:7.1f} ms  p99 {p99:7.1f} ms  "
+        f"{len(latencies) / elapsed:6.1f} req/s  rss {current_rss_mb():6.0f} MB  peak {peak_rss_mb():6.0f} MB"
+        f"{extra}"
+    )
+
+
+async def drive(send, concurrency: int, total: int):
+    # each worker takes the next request index until all are sent; returns per-request latencies
+    counter = iter(range(total))
+    latencies = []
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            await send(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return latencies, time.perf_counter() - start
+
+
+async def run_api(args, queries):
+    import httpx
+    import uvicorn
+
+    import backend.main
+    from backend.rag.rag_pipeline import RAGPipline
+    from benchmarks.fakes import FakeChatModel
+
+    chat = FakeChatModel(latency=args.chat_latency, token_delay=args.token_delay)
+    backend.main.create_rag_pipeline = partial(RAGPipline, llm=chat, llm_stream=chat)
+
+    server = uvicorn.Server(uvicorn.Config(backend.main.app, host="127.0.0.1", port=args.port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    rng = random.Random(args.seed)
+    session_ids = []
+
+    def next_request(i):
+        body = {"query": queries[i % len(queries)]}
+        if session_ids and rng.random() < args.follow_ups:
+            body["session_id"] = rng.choice(session_ids)
+        return body
+
+    limits = httpx.Limits(max_connections=max(args.levels), max_keepalive_connections=max(args.levels))
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=None, limits=limits) as client:
+        while (await client.get("/ready")).status_code != 200:
+            await asyncio.sleep(0.05)
+
+        async def send_query(i):
+            response = await client.post("/query", json=next_request(i))
+            response.raise_for_status()
+            session_ids.append(response.json()["session_id"])
+
+        time_to_first_token = []
+
+        async def send_stream(i):
+            start = time.perf_counter()
+            first = True
+            headers = {"Accept": "text/event-stream"}
+
+            async with client.stream("POST", "/query/stream", json=next_request(i), headers=headers) as response:
+                response.raise_for_status()
+                session_ids.append(response.headers["X-Session-ID"])
+
+                async for line in response.aiter_lines():
+                    if first and line == "event: token":
+                        first = False
+                        time_to_first_token.append(time.perf_counter() - start)
+                    elif line == "event: error":
+                        raise RuntimeError("stream failed")
+
+        senders = {"query": send_query, "stream": send_stream}
+
+        for scenario in args.scenarios:
+            if scenario not in senders:
+                continue
+
+            for concurrency in args.levels:
+                time_to_first_token.clear()
+                latencies, elapsed = await drive(senders[scenario], concurrency, args.requests)
+
+                extra = ""
+                if time_to_first_token:
+                    extra = (f"  ttft p50 {np.percentile(time_to_first_token, 50) * 1000:6.1f} ms"
+                             f" p95 {np.percentile(time_to_first_token, 95) * 1000:6.1f} ms")
+                report(f"{scenario} c={concurrency}", latencies, elapsed, extra)
+
+    server.should_exit = True
+    await server_task
+
+
+def run_ingest(args):
+    # ingestion imports "preprocessing..." with ml/ as a source root
+    sys.path.insert(0, ML_DIR)
+
+    import config
+
+    saved = (
+        config.PERSIST_DIR, config.EMBEDDING_CACHE_PATH, config.PDF_PAGE_CACHE_PATH,
+        config.INGESTION_CHECKPOINT_PATH, config.EMBEDDING_MAX_RETRIES
+    )
+
+    for workers in args.ingest_workers:
+        config.EMBEDDING_MAX_WORKERS = workers
+
+        # the second run sees an unchanged document: nothing is embedded or uploaded
+        with tempfile.TemporaryDirectory() as directory:
+            use_ingest_dir(directory)
+            for run in ("cold", "unchanged"):
+                ingest_once(args, f"ingest {run} workers={workers}")
+
+        # embedding fails halfway through, the rerun only embeds and uploads what is missing
+        with tempfile.TemporaryDirectory() as directory:
+            use_ingest_dir(directory)
+            config.EMBEDDING_MAX_RETRIES = 0
+            config.EMBEDDER.fail_after = args.ingest_fail_after
+            try:
+                ingest_once(args, f"ingest interrupted workers={workers}")
+            except RuntimeError as e:
+                print(f"{'':<28} stopped: {e}")
+            config.EMBEDDER.fail_after = None
+            ingest_once(args, f"ingest resumed workers={workers}")
+            config.EMBEDDING_MAX_RETRIES = saved[4]
+
+    (
+        config.PERSIST_DIR, config.EMBEDDING_CACHE_PATH, config.PDF_PAGE_CACHE_PATH,
+        config.INGESTION_CHECKPOINT_PATH, config.EMBEDDING_MAX_RETRIES
+    ) = saved
+
+
+def use_ingest_dir(directory):
+    import config
+
+    config.PERSIST_DIR = directory
+    config.EMBEDDING_CACHE_PATH = os.path.join(directory, "embeddings.sqlite3")
+    config.PDF_PAGE_CACHE_PATH = os.path.join(directory, "pdf_pages.sqlite3")
+    config.INGESTION_CHECKPOINT_PATH = os.path.join(directory, "checkpoint.json")
+
+
+def ingest_once(args, label):
+    import config
+    from benchmarks.fakes import FakeChatModel
+    from ml.ingestion_pipline import IngestionPipeline
+    from preprocessing.openai_chat_processor import OpenAIChatProcessor
+
+    chat_model = FakeChatModel(latency=args.chat_latency)
+    pipeline = IngestionPipeline(
+        source_file=args.pdf,
+        openai_chat_processor=OpenAIChatProcessor(llm=chat_model),
+    )
+
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()) if not args.verbose else contextlib.nullcontext():
+            pipeline.process_pdf()
+    finally:
+        elapsed = time.perf_counter() - start
+        pipeline.embedding_cache.close()
+        pipeline.pdf_page_cache.close()
+
+        print(
+            f"{label:<28} {elapsed:7.2f} s  "
+            f"embedding requests {config.EMBEDDER.requests:4d}  footer calls {chat_model.calls}  "
+            f"rss {current_rss_mb():6.0f} MB  peak {peak_rss_mb():6.0f} MB"
+        )
+        config.EMBEDDER.requests = 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", nargs="+", default=["query", "stream", "ingest"],
+                        choices=["query", "stream", "ingest"])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=128, help="requests per concurrency level")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES_PATH, help="jsonl file with a 'query' field")
+    parser.add_argument("--follow-ups", type=float, default=0.3, help="share of requests continuing a session")
+    parser.add_argument("--chat-latency", type=float, default=0.5)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--articles", type=int, default=400, help="synthetic articles in the seeded collection")
+    parser.add_argument("--no-answer-cache", action="store_true")
+    parser.add_argument("--ingest-workers", type=int, nargs="+", default=[4])
+    parser.add_argument("--ingest-fail-after", type=int, default=4,
+                        help="embedding requests before the simulated outage of the interrupted run")
+    parser.add_argument("--pdf", default=PDF_PATH)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+
+    with tempfile.TemporaryDirectory() as persist_dir:
+        use_offline_settings(persist_dir)
+
+        import config
+        from benchmarks.corpus import seed_collection
+        from benchmarks.fakes import FakeEmbeddings
+        from ml.embedder import Embedder
+        from vector_db import VectorDB
+
+        config.EMBEDDER = FakeEmbeddings(
+            request_latency=args.embedding_latency, per_text_latency=0, dimensions=args.dimensions
+        )
+        config.ANSWER_CACHE_ENABLED = not args.no_answer_cache
+        config.SESSION_BACKEND = "memory"
+
+        print(f"{len(queries)} queries from {args.queries}, rss {current_rss_mb():.0f} MB")
+
+        if {"query", "stream"} & set(args.scenarios):
+            with contextlib.redirect_stdout(io.StringIO()) if not args.verbose else contextlib.nullcontext():
+                seed_collection(
+                    VectorDB(backend="chroma"),
+                    Embedder(config.EMBEDDER, config.MAX_CHUNKS_TOKENS, "bench", "bench.pdf"),
+                    n_articles=args.articles,
+                )
+            config.EMBEDDER.requests = 0
+            asyncio.run(run_api(args, queries))
+
+        if "ingest" in args.scenarios:
+            run_ingest(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Ingestion embedding throughput with a local fake embedding model.
+
+before: one embed_query round-trip per chunk (the old embed_and_prepare_chunks loop)
+after:  Embedder.embed_chunks with batched embed_documents and concurrent batches
+
+python -m benchmarks.bench_embedding --chunks 500 --latency 0.02
+"""
+import argparse
+import time
+
+from benchmarks.fakes import FakeEmbeddings
+from ml.embedder import Embedder
+
+
+def synthetic_entries(embedder: Embedder, n: int):
+    entries = []
+    for i in range(n):
+        entries.extend(embedder.prepare_chunks(
+            text=f"Стаття {i}. Крадіжка. Таємне викрадення чужого майна (крадіжка) {i}",
+            part="ОСОБЛИВА ЧАСТИНА",
+            section_title="Розділ VI",
+            article_num=str(i),
+        ))
+
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.02, help="fake round-trip latency, seconds")
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    fake = FakeEmbeddings(request_latency=args.latency)
+    embedder = Embedder(
+        embedder=fake,
+        max_chunk_tokens=1000,
+        law_name="bench",
+        source_file="bench.pdf",
+        batch_size=args.batch_size,
+        max_workers=args.workers,
+    )
+
+    entries = synthetic_entries(embedder, args.chunks)
+    start = time.perf_counter()
+    for entry in entries:
+        entry["vector"] = fake.embed_query(entry["page_content"])
+    before = time.perf_counter() - start
+    before_requests = fake.requests
+
+    fake.requests = 0
+    entries = synthetic_entries(embedder, args.chunks)
+    start = time.perf_counter()
+    embedder.embed_chunks(entries)
+    after = time.perf_counter() - start
+
+    print(f"before: {len(entries)} chunks in {before:.2f}s, {before_requests} requests")
+    print(f" after: {len(entries)} chunks in {after:.2f}s, {fake.requests} requests")
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Recall@k of reduced-dimension and quantized NumPy stores against the
+full-precision vectors, with the matrix size and search latency of each setting.
+
+Vectors come from the collection in --persist-dir (real embeddings, run after
+ingestion). Without one, a synthetic clustered corpus is used whose variance
+decays across dimensions like text-embedding-3 vectors; treat those numbers
+as indicative only.
+
+python -m benchmarks.bench_embedding_compression --persist-dir ./chroma_db --k 5 15
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.utils import use_offline_settings
+
+
+def synthetic_vectors(n: int, dims: int, topics: int = 200, seed: int = 11) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    decay = 1 / np.sqrt(np.arange(1, dims + 1))
+    centroids = rng.standard_normal((topics, dims)) * decay
+    vectors = centroids[rng.integers(0, topics, n)] + 0.7 * rng.standard_normal((n, dims)) * decay
+
+    return vectors.astype(np.float32)
+
+
+def load_vectors(persist_dir: str):
+    use_offline_settings(persist_dir)
+
+    from vector_db import VectorDB
+
+    data = VectorDB(backend="chroma").vectordb._collection.get(include=["embeddings"])
+    embeddings = data["embeddings"]
+
+    return data["ids"], None if embeddings is None or len(embeddings) == 0 else np.asarray(embeddings, np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--persist-dir", default=None)
+    parser.add_argument("--synthetic-chunks", type=int, default=6000)
+    parser.add_argument("--synthetic-dims", type=int, default=1536)
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[1024, 512, 256])
+    parser.add_argument("--dtypes", nargs="+", default=["float32", "float16", "int8"])
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--noise", type=float, default=0.5, help="query = stored vector + noise, as a paraphrase")
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 15])
+    args = parser.parse_args()
+
+    ids, vectors = load_vectors(args.persist_dir) if args.persist_dir else (None, None)
+    if vectors is None:
+        print("No collection given or it is empty, using synthetic vectors.")
+        vectors = synthetic_vectors(args.synthetic_chunks, args.synthetic_dims)
+        ids = [str(i) for i in range(len(vectors))]
+
+    from numpy_vector_store import NumpyVectorStore
+
+    rng = np.random.default_rng(5)
+    full_dims = vectors.shape[1]
+    rows = rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = unit[rows] + args.noise * rng.standard_normal((len(rows), full_dims)).astype(np.float32) / np.sqrt(full_dims)
+    max_k = max(args.k)
+
+    settings = [(None, "float32")] + [
+        (dims, dtype) for dims in [None] + args.dimensions for dtype in args.dtypes
+        if (dims, dtype) != (None, "float32") and (dims is None or dims < full_dims)
+    ]
+    print(f"{len(ids)} vectors, {full_dims} dims, {len(rows)} queries\n")
+
+    reference = None
+    with tempfile.TemporaryDirectory() as directory:
+        texts = [""] * len(ids)
+        metadatas = [{}] * len(ids)
+
+        for dims, dtype in settings:
+            NumpyVectorStore.write(ids, texts, metadatas, vectors, dtype=dtype, dimensions=dims, directory=directory)
+            store = NumpyVectorStore().load(directory)
+
+            start = time.perf_counter()
+            normalized = store._normalize(queries[:, :store.matrix.shape[1]])
+            top = np.argsort(-store._scores(normalized), axis=1)[:, :max_k]
+            elapsed = time.perf_counter() - start
+
+            if reference is None:
+                reference = top
+
+            size_mb = (store.matrix.nbytes + (store.scales.nbytes if store.scales is not None else 0)) / 2 ** 20
+            recalls = ", ".join(
+                f"recall@{k} {np.mean([len(set(a[:k]) & set(b[:k])) / k for a, b in zip(top, reference)]):.3f}"
+                for k in args.k
+            )
+            print(
+                f"{dims or full_dims:>5} dims {dtype:>7}: {size_mb:7.1f} MB, "
+                f"{elapsed / len(rows) * 1000:6.2f} ms/query (one batch), {recalls}"
+            )
+
+
+if __name__ == "__main__":
+    main()
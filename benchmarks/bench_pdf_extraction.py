@@ -0,0 +1,75 @@
+"""
+PDF text extraction: the previous sequential loop versus Utils.load_pdf_text
+with a process pool, and with a warm page cache. Checks that every variant
+returns exactly the same text.
+
+python -m benchmarks.bench_pdf_extraction --workers 1 2 4 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from pypdf import PdfReader
+
+from benchmarks.utils import current_rss_mb
+from ml.pdf_page_cache import PdfPageCache
+from ml.utils import Utils
+
+PDF_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml", "data",
+                        "criminal_code_of_ukraine.pdf")
+
+
+def legacy_load_pdf_text(path: str) -> str:
+    reader = PdfReader(path)
+    pages = []
+
+    for page in reader.pages:
+        text = page.extract_text()
+        if text:
+            pages.append(text)
+
+    return '\n'.join(pages)
+
+
+def timed(label, func, reference=None):
+    start = time.perf_counter()
+    text = func()
+    elapsed = time.perf_counter() - start
+
+    identical = "" if reference is None else ("  identical" if text == reference else "  DIFFERENT OUTPUT")
+    print(f"{label:<24} {elapsed:7.2f} s  {len(text)} chars  rss {current_rss_mb():.0f} MB{identical}")
+
+    return text, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pdf", default=PDF_PATH)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--pages-per-task", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"{len(PdfReader(args.pdf).pages)} pages, {os.cpu_count()} CPUs")
+    reference, _ = timed("legacy sequential", lambda: legacy_load_pdf_text(args.pdf))
+
+    for workers in args.workers:
+        timed(f"pool workers={workers}",
+              lambda: Utils.load_pdf_text(args.pdf, workers, args.pages_per_task), reference)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = PdfPageCache(os.path.join(directory, "pages.sqlite3"), max_files=5)
+        timed("cold cache", lambda: Utils.load_pdf_text(args.pdf, max(args.workers), args.pages_per_task, cache),
+              reference)
+        timed("warm cache", lambda: Utils.load_pdf_text(args.pdf, max(args.workers), args.pages_per_task, cache),
+              reference)
+
+        start = time.perf_counter()
+        first_page = next(Utils.iter_pdf_pages(args.pdf, max(args.workers), args.pages_per_task))
+        print(f"{'first streamed page':<24} {time.perf_counter() - start:7.2f} s  {len(first_page)} chars")
+
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Load test for /query against a local fake OpenAI server.
+
+Each concurrency level sends the same number of requests through the ASGI app;
+with the async path throughput should grow with concurrency until the fake
+model latency is saturated. --blocking replays the old behaviour (sync
+retrieval + invoke inside the event loop) for comparison.
+
+python -m benchmarks.bench_query_load --requests 64 --levels 1 4 16 64
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.fake_openai_server import start_in_thread
+from benchmarks.utils import use_offline_settings
+
+
+async def run_level(send, concurrency: int, total_requests: int) -> float:
+    queue = asyncio.Queue()
+    for i in range(total_requests):
+        queue.put_nowait(i)
+
+    async def worker():
+        while not queue.empty():
+            i = queue.get_nowait()
+            await send(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return time.perf_counter() - start
+
+
+async def main_async(args):
+    import httpx
+
+    from backend.main import app, get_rag
+    from backend.rag.chat_session import ChatSession
+
+    async with app.router.lifespan_context(app):
+        rag = await get_rag()
+        transport = httpx.ASGITransport(app=app)
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            async def send_async(i):
+                response = await client.post("/query", json={"query": f"покарання за крадіжку {i}"})
+                response.raise_for_status()
+
+            async def send_blocking(i):
+                rag.run_rag_pipline(f"покарання за крадіжку {i}", ChatSession())
+
+            send = send_blocking if args.blocking else send_async
+            mode = "blocking" if args.blocking else "async"
+
+            for concurrency in args.levels:
+                elapsed = await run_level(send, concurrency, args.requests)
+                print(
+                    f"{mode:>8} concurrency={concurrency:<4} "
+                    f"{args.requests} requests in {elapsed:.2f}s -> {args.requests / elapsed:.1f} req/s"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--chat-latency", type=float, default=0.5)
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--blocking", action="store_true")
+    args = parser.parse_args()
+
+    start_in_thread(args.port, chat_latency=args.chat_latency, embedding_latency=args.embedding_latency)
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1"
+
+    with tempfile.TemporaryDirectory() as persist_dir:
+        use_offline_settings(persist_dir)
+        asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
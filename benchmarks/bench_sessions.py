@@ -0,0 +1,60 @@
+"""
+Session-creation latency and RSS per N sessions.
+
+before: every session builds its own RAGPipline (vector store + chat clients + chain),
+        which is what /session/new used to do
+after:  every session is a ChatSession holding only its chat history
+
+python -m benchmarks.bench_sessions --sessions 1000
+"""
+import argparse
+import gc
+import tempfile
+import time
+
+from benchmarks.utils import current_rss_mb, use_offline_settings
+
+
+def measure(label, factory, n):
+    gc.collect()
+    rss_before = current_rss_mb()
+    sessions = {}
+
+    start = time.perf_counter()
+    for i in range(n):
+        sessions[i] = factory()
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    rss_delta = current_rss_mb() - rss_before
+
+    print(
+        f"{label:>6}: {n} sessions in {elapsed:.3f}s "
+        f"({elapsed / n * 1000:.3f} ms/session), "
+        f"RSS +{rss_delta:.1f} MB ({rss_delta / n * 1000:.1f} MB per 1000)"
+    )
+
+    return sessions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as persist_dir:
+        use_offline_settings(persist_dir)
+
+        from backend.rag.chat_session import ChatSession
+        from backend.rag.rag_pipeline import RAGPipline
+
+        # warm imports and the shared engine so neither side pays one-off costs
+        RAGPipline()
+
+        before = measure("before", RAGPipline, args.sessions)
+        del before
+        measure("after", ChatSession, args.sessions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Startup cost of the API: import time of config and backend.main in fresh
+interpreters, and, for a uvicorn server started in a subprocess on a seeded
+temporary collection, the time until /health answers (process up) and until
+/ready turns 200 (collection opened, chunk and lexical indexes loaded).
+
+python -m benchmarks.bench_startup --repeats 5 --articles 400
+"""
+import argparse
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.utils import use_offline_settings
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_SNIPPET = "import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+
+
+def child_env():
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT_DIR, env.get("PYTHONPATH")]))
+
+    return env
+
+
+def import_seconds(module: str) -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET.format(module=module)],
+        cwd=ROOT_DIR, env=child_env(), capture_output=True, text=True, check=True
+    )
+
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def serve(persist_dir: str, port: int):
+    # runs in the server subprocess
+    use_offline_settings(persist_dir)
+
+    import uvicorn
+
+    uvicorn.run("backend.main:app", host="127.0.0.1", port=port, log_level="warning")
+
+
+def time_to_ready(persist_dir: str, port: int, timeout: float = 120.0):
+    import httpx
+
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--serve", persist_dir, "--port", str(port)],
+        cwd=ROOT_DIR, env=child_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    healthy = ready = None
+
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1.0) as client:
+            while ready is None and time.perf_counter() - start < timeout:
+                try:
+                    if healthy is None and client.get("/health").status_code == 200:
+                        healthy = time.perf_counter() - start
+                    if client.get("/ready").status_code == 200:
+                        ready = time.perf_counter() - start
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+
+    if ready is None:
+        raise RuntimeError(f"server did not become ready within {timeout}s")
+
+    return healthy, ready
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--articles", type=int, default=400, help="synthetic articles in the seeded collection")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--serve", metavar="PERSIST_DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    for module in ("config", "backend.main"):
+        seconds = [import_seconds(module) for _ in range(args.repeats)]
+        print(f"import {module:<13} median {np.median(seconds) * 1000:7.1f} ms  max {max(seconds) * 1000:7.1f} ms")
+
+    with tempfile.TemporaryDirectory() as persist_dir:
+        use_offline_settings(persist_dir)
+
+        import config
+        from benchmarks.corpus import seed_collection
+        from benchmarks.fakes import FakeEmbeddings
+        from ml.embedder import Embedder
+        from vector_db import VectorDB
+
+        config.EMBEDDER = FakeEmbeddings(request_latency=0, per_text_latency=0)
+
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            seed_collection(
+                VectorDB(backend="chroma"),
+                Embedder(config.EMBEDDER, config.MAX_CHUNKS_TOKENS, "bench", "bench.pdf"),
+                n_articles=args.articles,
+            )
+
+        runs = [time_to_ready(persist_dir, args.port) for _ in range(args.repeats)]
+        healthy, ready = (np.array(values) for values in zip(*runs))
+        print(
+            f"server ({args.articles} articles): /health after median {np.median(healthy) * 1000:7.1f} ms, "
+            f"/ready after median {np.median(ready) * 1000:7.1f} ms (max {ready.max() * 1000:7.1f} ms)"
+        )
+
+
+if __name__ == "__main__":
+    main()
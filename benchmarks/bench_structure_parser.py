@@ -0,0 +1,113 @@
+"""
+StructureParser regression check and benchmark.
+
+Builds the Part -> Section -> Article tree for the bundled PDF and compares the
+(part, section, article, text) entries with the reference copy of the original
+nested finditer loops (tests/legacy_structure_parser.py), on the real
+normalized parts and on random documents assembled from headings and filler
+lines. Then times both parsers. No embedding calls are made. The same
+comparison through Embedder runs in tests/test_structure_parser.py.
+
+python -m benchmarks.bench_structure_parser --fuzz 2000 --repeats 10
+"""
+import argparse
+import random
+import time
+
+from benchmarks.bench_text_normalizer import PDF_PATH, real_parts
+from ml.preprocessing.legal_text_patterns import LegalTextPatterns
+from ml.preprocessing.structure_parser import StructureParser
+from ml.preprocessing.text_normalizer import TextNormalizer
+from tests.legacy_structure_parser import LegacyStructureParser, fuzz_document
+
+
+def tree_main(text):
+    return [
+        (part.title, section.title, article.number, article.title)
+        for part in StructureParser.parse_main(
+            text,
+            LegalTextPatterns.PART_PATTERN,
+            LegalTextPatterns.SECTION_PATTERN_MAIN_PART,
+            LegalTextPatterns.ARTICLE_PATTERN_MAIN_PART
+        )
+        for section in part.sections
+        for article in section.articles
+    ]
+
+
+def tree_additional(text):
+    return [
+        (part.title, section.title, None, section.text)
+        for part in StructureParser.parse_additional(
+            text, LegalTextPatterns.PART_PATTERN, LegalTextPatterns.SECTION_PATTERN_ADDITIONAL_PART
+        )
+        for section in part.sections
+    ]
+
+
+def legacy_main(text):
+    return LegacyStructureParser.parse_main(
+        text,
+        LegalTextPatterns.PART_PATTERN,
+        LegalTextPatterns.SECTION_PATTERN_MAIN_PART,
+        LegalTextPatterns.ARTICLE_PATTERN_MAIN_PART
+    )
+
+
+def legacy_additional(text):
+    return LegacyStructureParser.parse_additional(
+        text, LegalTextPatterns.PART_PATTERN, LegalTextPatterns.SECTION_PATTERN_ADDITIONAL_PART
+    )
+
+
+def measure(parse, text, repeats):
+    elapsed = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        parse(text)
+        elapsed = min(elapsed, time.perf_counter() - start)
+
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pdf", default=PDF_PATH)
+    parser.add_argument("--fuzz", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for _ in range(args.fuzz):
+        document = fuzz_document(rng)
+        for legacy, current in ((legacy_main, tree_main), (legacy_additional, tree_additional)):
+            if legacy(document) != current(document):
+                raise SystemExit(f"{current.__name__} differs on {document!r}")
+    print(f"fuzz: {args.fuzz} documents identical")
+
+    first_part, second_part = real_parts(args.pdf)
+    # same preparation as IngestionPipeline.process_pdf
+    main_text = TextNormalizer.normalize(first_part) + "\nСтаття 999. Кінець документа"
+    additional_text = TextNormalizer.normalize(second_part)
+
+    cases = (
+        ("main", main_text, legacy_main, tree_main),
+        ("additional", additional_text, legacy_additional, tree_additional),
+    )
+
+    for name, text, legacy, current in cases:
+        entries = current(text)
+        if legacy(text) != entries:
+            raise SystemExit(f"{name} part of {args.pdf} differs")
+
+        legacy_time = measure(legacy, text, args.repeats)
+        current_time = measure(current, text, args.repeats)
+        print(
+            f"{name:>10}: {len(entries)} entries identical, "
+            f"legacy {legacy_time * 1000:6.1f} ms, tree {current_time * 1000:6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+TextNormalizer regression check and benchmark.
+
+Compares the compiled normalizer with the reference copy of the original
+re.sub chain (tests/legacy_text_normalizer.py): byte-for-byte on the bundled
+PDF (main text split as in process_pdf) and on random fragments built from the
+tokens the rules react to. Then reports time and peak traced memory for both.
+The same comparison on a committed excerpt runs in tests/test_text_normalizer.py.
+
+python -m benchmarks.bench_text_normalizer --fuzz 20000 --repeats 10
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from ml.preprocessing.text_normalizer import TextNormalizer
+from tests.legacy_text_normalizer import LegacyTextNormalizer, fuzz_fragment
+
+ML_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml")
+PDF_PATH = os.path.join(ML_DIR, "data", "criminal_code_of_ukraine.pdf")
+
+
+def real_parts(path: str):
+    sys.path.insert(0, ML_DIR)  # ingestion modules import "preprocessing..." with ml/ as a source root
+    from ml.utils import Utils
+    from preprocessing.text_processor import TextProcessor
+
+    text = TextProcessor.remove_header(Utils.load_pdf_text(path))
+    main_text, _ = TextProcessor.split_main_and_footer(text)
+
+    return TextProcessor.split_main_into_2_parts(main_text)
+
+
+def measure(normalize, parts, repeats):
+    # best of repeats, the least disturbed run
+    elapsed = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for part in parts:
+            normalize(part)
+        elapsed = min(elapsed, time.perf_counter() - start)
+
+    tracemalloc.start()
+    for part in parts:
+        normalize(part)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pdf", default=PDF_PATH)
+    parser.add_argument("--fuzz", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    checks = {
+        "fix_line_breaks": (LegacyTextNormalizer.fix_line_breaks, TextNormalizer.fix_line_breaks),
+        "enforce_headings": (LegacyTextNormalizer.enforce_headings, TextNormalizer.enforce_headings),
+        "normalize": (LegacyTextNormalizer.normalize, TextNormalizer.normalize),
+    }
+
+    for name, (legacy, current) in checks.items():
+        for _ in range(args.fuzz):
+            fragment = fuzz_fragment(rng)
+            if legacy(fragment) != current(fragment):
+                raise SystemExit(f"{name} differs on {fragment!r}:\n{legacy(fragment)!r}\n{current(fragment)!r}")
+    print(f"fuzz: {args.fuzz} fragments x {len(checks)} functions identical")
+
+    parts = real_parts(args.pdf)
+    for i, part in enumerate(parts, 1):
+        if LegacyTextNormalizer.normalize(part) != TextNormalizer.normalize(part):
+            raise SystemExit(f"part {i} of {args.pdf} differs")
+    print(f"pdf: {sum(len(part) for part in parts)} chars in {len(parts)} parts identical")
+
+    for label, normalize in (("legacy", LegacyTextNormalizer.normalize), ("compiled", TextNormalizer.normalize)):
+        elapsed, peak = measure(normalize, parts, args.repeats)
+        print(f"{label:>9}: {elapsed * 1000:7.1f} ms per document, peak {peak / 2 ** 20:5.1f} MB traced")
+
+
+if __name__ == "__main__":
+    main()
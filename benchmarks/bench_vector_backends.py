@@ -0,0 +1,97 @@
+"""
+Chroma versus the NumPy backend on the same synthetic collection: single-query
+latency, batched throughput, filtered gets and top-k overlap with Chroma.
+
+python -m benchmarks.bench_vector_backends --articles 2000 --dims 1536 --queries 200
+"""
+import argparse
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.utils import use_offline_settings, current_rss_mb
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=2000)
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=15)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as persist_dir:
+        use_offline_settings(persist_dir)
+
+        import config
+        from benchmarks.corpus import seed_collection
+        from benchmarks.fakes import FakeEmbeddings
+        from ml.embedder import Embedder
+        from vector_db import VectorDB
+
+        config.EMBEDDER = FakeEmbeddings(request_latency=0, per_text_latency=0, dimensions=args.dims)
+        chroma = VectorDB(backend="chroma")
+        entries = seed_collection(
+            chroma, Embedder(config.EMBEDDER, config.MAX_CHUNKS_TOKENS, "bench", "bench.pdf"),
+            n_articles=args.articles
+        )
+
+        backends = {"chroma": chroma}
+        for dtype in ("float32", "float16", "int8"):
+            config.NUMPY_STORE_DIR = f"numpy_store_{dtype}"
+            chroma.export_numpy_store(dtype=dtype)
+            rss_before = current_rss_mb()
+            backends[f"numpy-{dtype}"] = VectorDB(backend="numpy")
+            print(f"numpy-{dtype}: +{current_rss_mb() - rss_before:.1f} MB RSS after load")
+
+        rng = random.Random(3)
+        queries = [np.random.default_rng(i).standard_normal(args.dims).tolist() for i in range(args.queries)]
+        print(f"\n{len(entries)} chunks, {args.dims} dims, k={args.k}, {args.queries} queries\n")
+
+        reference = None
+        for label, vectordb in backends.items():
+            latencies = []
+            results = []
+            for embedding in queries:
+                start = time.perf_counter()
+                results.append(vectordb.similarity_search("", args.k, embedding=embedding))
+                latencies.append(time.perf_counter() - start)
+
+            ids = [[doc.id for doc in docs] for docs in results]
+            if reference is None:
+                reference = ids
+            overlap = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(ids, reference)])
+
+            print(
+                f"{label:>14}: p50 {percentile(latencies, 50):6.2f} ms, p95 {percentile(latencies, 95):6.2f} ms, "
+                f"{len(queries) / sum(latencies):7.0f} q/s, top-{args.k} overlap with chroma {overlap:.3f}"
+            )
+
+        for label, vectordb in backends.items():
+            if vectordb.numpy_store is None:
+                continue
+
+            start = time.perf_counter()
+            for i in range(0, len(queries), args.batch_size):
+                vectordb.numpy_store.similarity_search_by_vectors(queries[i:i + args.batch_size], args.k)
+            elapsed = time.perf_counter() - start
+            print(f"{label:>14}: batched x{args.batch_size}: {len(queries) / elapsed:7.0f} q/s")
+
+        article_nums = [str(rng.randint(1, args.articles)) for _ in range(args.queries)]
+        for label, vectordb in backends.items():
+            start = time.perf_counter()
+            for num in article_nums:
+                vectordb.get_chunks({"article_num": {"$in": [num]}})
+            elapsed = time.perf_counter() - start
+            print(f"{label:>14}: filtered get {elapsed / len(article_nums) * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
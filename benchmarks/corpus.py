@@ -0,0 +1,47 @@
+import random
+from typing import List, Dict
+
+from ml.embedder import Embedder
+
+SPECIAL_PART = "ОСОБЛИВА ЧАСТИНА"
+FINAL_PART = "ПРИКІНЦЕВІ ТА ПЕРЕХІДНІ ПОЛОЖЕННЯ"
+SECTIONS = ["Розділ I", "Розділ II", "Розділ III", "Розділ IV", "Розділ V", "Розділ VI"]
+WORDS = (
+    "особа майно покарання позбавлення волі штраф крадіжка грабіж розбій шахрайство "
+    "умисне вбивство злочин кримінальне правопорушення суд вирок строк років частина"
+).split()
+
+
+def synthetic_code_entries(embedder: Embedder, n_articles: int = 400, n_final_sections: int = 10,
+                           seed: int = 7) -> List[Dict]:
+    # a Criminal-Code-shaped corpus: articles of 1-4 chunks plus long final-provision sections
+    rng = random.Random(seed)
+    entries = []
+
+    for num in range(1, n_articles + 1):
+        n_words = rng.choice([60, 120, 250, 400, 600])
+        body = " ".join(rng.choice(WORDS) for _ in range(n_words))
+        entries.extend(embedder.prepare_chunks(
+            text=f"Стаття {num}. {body}",
+            part=SPECIAL_PART,
+            section_title=SECTIONS[num % len(SECTIONS)],
+            article_num=str(num),
+        ))
+
+    for i in range(n_final_sections):
+        body = " ".join(rng.choice(WORDS) for _ in range(1500))
+        entries.extend(embedder.prepare_chunks(
+            text=body,
+            part=FINAL_PART,
+            section_title=SECTIONS[i % len(SECTIONS)] + f"-{i}",
+        ))
+
+    return entries
+
+
+def seed_collection(vectordb, embedder: Embedder, **kwargs) -> List[Dict]:
+    entries = synthetic_code_entries(embedder, **kwargs)
+    embedder.embed_chunks(entries)
+    vectordb.upload_data(entries)
+
+    return entries
@@ -0,0 +1,139 @@
+"""
+Minimal stand-in for the OpenAI chat-completions and embeddings endpoints with
+configurable latency, so load tests never leave the machine.
+
+python -m benchmarks.fake_openai_server --port 8765 --chat-latency 0.5
+then point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import threading
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from starlette.responses import JSONResponse, StreamingResponse
+
+EMBEDDING_DIMENSIONS = 1536
+FAKE_ANSWER = (
+    "Відповідно до статті 185 Кримінального кодексу України крадіжкою є таємне викрадення "
+    "чужого майна. Покарання залежить від обставин, визначених частинами цієї статті."
+)
+
+
+def fake_embedding(text, dimensions: int = EMBEDDING_DIMENSIONS):
+    # deterministic unit vector derived from the text, so equal inputs give equal vectors
+    if not isinstance(text, str):
+        text = " ".join(str(token) for token in text)
+
+    seed = hashlib.sha256(text.encode("utf-8")).digest()
+    values = [
+        (seed[i % len(seed)] ^ (i * 31 % 251)) / 255.0 - 0.5
+        for i in range(dimensions)
+    ]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+
+    return [v / norm for v in values]
+
+
+def create_app(chat_latency: float = 0.5, embedding_latency: float = 0.05, token_delay: float = 0.01):
+    app = FastAPI()
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body["input"]
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+
+        dimensions = body.get("dimensions") or EMBEDDING_DIMENSIONS
+        await asyncio.sleep(embedding_latency)
+
+        return JSONResponse({
+            "object": "list",
+            "model": body.get("model"),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": fake_embedding(text, dimensions)}
+                for i, text in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        })
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = body.get("model")
+
+        if not body.get("stream"):
+            await asyncio.sleep(chat_latency)
+
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": FAKE_ANSWER},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+
+        async def events():
+            await asyncio.sleep(chat_latency)
+
+            for word in FAKE_ANSWER.split(" "):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                await asyncio.sleep(token_delay)
+
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def start_in_thread(port: int, **latencies) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(create_app(**latencies), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+
+    while not server.started:
+        time.sleep(0.01)
+
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--chat-latency", type=float, default=0.5)
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_app(chat_latency=args.chat_latency, embedding_latency=args.embedding_latency),
+        host="127.0.0.1",
+        port=args.port,
+    )
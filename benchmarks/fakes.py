@@ -0,0 +1,122 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from benchmarks.fake_openai_server import fake_embedding, EMBEDDING_DIMENSIONS, FAKE_ANSWER
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic offline embedding model. Every call sleeps request_latency
+    (network round-trip) plus per_text_latency for each input text.
+    Requests after the first fail_after raise, to simulate an outage.
+    """
+
+    def __init__(
+            self,
+            request_latency: float = 0.05,
+            per_text_latency: float = 0.0005,
+            dimensions: int = EMBEDDING_DIMENSIONS,
+            fail_after: Optional[int] = None
+    ):
+        self.request_latency = request_latency
+        self.per_text_latency = per_text_latency
+        self.dimensions = dimensions
+        self.fail_after = fail_after
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            self.requests += 1
+            if self.fail_after is not None and self.requests > self.fail_after:
+                raise RuntimeError("fake embedding outage")
+        time.sleep(self.request_latency + self.per_text_latency * len(texts))
+
+        return [fake_embedding(text, self.dimensions) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic offline chat model: waits latency seconds plus prompt_char_latency per
+    prompt character before the first token and token_delay between streamed words.
+    Footer-extraction prompts get valid footer JSON, history-summary prompts FAKE_ANSWER,
+    everything else answer.
+    """
+
+    latency: float = 0.5
+    prompt_char_latency: float = 0.0
+    token_delay: float = 0.01
+    answer: str = FAKE_ANSWER
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _answer(self, messages: List[BaseMessage]) -> str:
+        prompt = messages[-1].content if messages else ""
+
+        if "permanent_link" in prompt:
+            return json.dumps({
+                "text": prompt.rsplit("Text to process:", 1)[-1].split("Example JSON format:", 1)[0].strip(),
+                "act_type": "Кодекс",
+                "act_name": "Кримінальний кодекс України",
+                "signed_by": "Президент України",
+                "number_and_date": "№ 2341-III від 05.04.2001",
+                "edition": "benchmark",
+                "status": "чинний",
+                "permanent_link": "https://zakon.rada.gov.ua/go/2341-14",
+            }, ensure_ascii=False)
+
+        if "running summary" in prompt:
+            return FAKE_ANSWER
+
+        return self.answer
+
+    def _delay(self, messages: List[BaseMessage]) -> float:
+        return self.latency + self.prompt_char_latency * sum(len(message.content) for message in messages)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        time.sleep(self._delay(messages))
+
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._answer(messages)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        await asyncio.sleep(self._delay(messages))
+
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._answer(messages)))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        self.calls += 1
+        time.sleep(self._delay(messages))
+
+        for word in self._answer(messages).split(" "):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            time.sleep(self.token_delay)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        self.calls += 1
+        await asyncio.sleep(self._delay(messages))
+
+        for word in self._answer(messages).split(" "):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            await asyncio.sleep(self.token_delay)
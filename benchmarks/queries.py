@@ -0,0 +1,24 @@
+import json
+import os
+from typing import List
+
+DEFAULT_QUERIES_PATH = os.path.join(os.path.dirname(__file__), "data", "queries.jsonl")
+
+
+def load_queries(path: str = DEFAULT_QUERIES_PATH, field: str = "query") -> List[str]:
+    # any jsonl with a "query" field can be replayed, e.g. queries exported from production logs
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+
+            value = json.loads(line).get(field)
+            if value:
+                queries.append(value)
+
+    if not queries:
+        raise ValueError(f"No '{field}' values found in {path}")
+
+    return queries
@@ -0,0 +1,24 @@
+import os
+import resource
+
+
+def current_rss_mb() -> float:
+    # /proc gives the current resident set; ru_maxrss (peak, KiB on Linux) is the fallback
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def use_offline_settings(persist_dir: str):
+    # must run before config is imported anywhere
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+    import config
+    config.PERSIST_DIR = persist_dir
+
+    if config.OPENAI_BASE_URL:
+        # the context-length check needs tiktoken encodings downloaded from the internet
+        config.EMBEDDER = config.make_embedder(check_embedding_ctx_length=False)
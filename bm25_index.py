@@ -0,0 +1,137 @@
+import json
+import math
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+import config
+from ml.preprocessing.text_normalizer import TextNormalizer
+
+
+class BM25Index:
+    """
+    In-process Okapi BM25 index over the chunks of the collection. Built at ingestion,
+    persisted next to the Chroma files and loaded into memory by the backend.
+    """
+
+    TOKEN_PATTERN = re.compile(r"[\w’]+")
+    # common Ukrainian inflection endings, longest first; stripping them lets "крадіжку" match "крадіжка"
+    ENDINGS = sorted([
+        "ами", "ями", "ові", "еві", "ого", "ому", "ими", "іми", "ою", "ею", "ах", "ях", "ом", "ем",
+        "ів", "ей", "ий", "ій", "ої", "их", "іх", "им", "ім", "а", "я", "у", "ю", "і", "и", "е", "о",
+        "ь", "ї", "й",
+    ], key=len, reverse=True)
+    MIN_STEM_LENGTH = 3
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[Dict] = []
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.idf: Dict[str, float] = {}
+        self.avg_doc_length = 0.0
+
+    @staticmethod
+    def default_path() -> str:
+        return os.path.join(config.PERSIST_DIR, config.BM25_INDEX_FILE)
+
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        tokens = []
+
+        for token in cls.TOKEN_PATTERN.findall(TextNormalizer.normalize_apostrophes(text).casefold()):
+            for ending in cls.ENDINGS:
+                if token.endswith(ending) and len(token) - len(ending) >= cls.MIN_STEM_LENGTH:
+                    token = token[:-len(ending)]
+                    break
+            tokens.append(token)
+
+        return tokens
+
+    def build(self, ids: List[str], texts: List[str], metadatas: List[Dict]):
+        self.ids, self.texts, self.metadatas = list(ids), list(texts), list(metadatas)
+        self.doc_lengths = []
+        postings = {}
+
+        for doc_idx, text in enumerate(self.texts):
+            tokens = self.tokenize(text)
+            self.doc_lengths.append(len(tokens))
+
+            frequencies = {}
+            for token in tokens:
+                frequencies[token] = frequencies.get(token, 0) + 1
+            for token, frequency in frequencies.items():
+                postings.setdefault(token, []).append((doc_idx, frequency))
+
+        self.postings = postings
+        self._compute_statistics()
+
+        return self
+
+    def _compute_statistics(self):
+        n_docs = len(self.doc_lengths)
+        self.avg_doc_length = sum(self.doc_lengths) / n_docs if n_docs else 0.0
+        self.idf = {
+            token: math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for token, docs in self.postings.items()
+        }
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        # returns (doc_idx, score) best first
+        scores = {}
+
+        for token in set(self.tokenize(query)):
+            idf = self.idf.get(token)
+            if idf is None:
+                continue
+
+            for doc_idx, frequency in self.postings[token]:
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc_idx] / self.avg_doc_length
+                scores[doc_idx] = scores.get(doc_idx, 0.0) + idf * frequency * (self.k1 + 1) / (
+                        frequency + self.k1 * length_norm
+                )
+
+        return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k]
+
+    def save(self, path: Optional[str] = None):
+        path = path or self.default_path()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        data = {
+            "k1": self.k1,
+            "b": self.b,
+            "ids": self.ids,
+            "texts": self.texts,
+            "metadatas": self.metadatas,
+            "doc_lengths": self.doc_lengths,
+            "postings": self.postings,
+        }
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def load(self, vectordb=None, path: Optional[str] = None):
+        path = path or self.default_path()
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+
+            self.k1, self.b = data["k1"], data["b"]
+            self.ids, self.texts, self.metadatas = data["ids"], data["texts"], data["metadatas"]
+            self.doc_lengths = data["doc_lengths"]
+            self.postings = {token: [tuple(p) for p in docs] for token, docs in data["postings"].items()}
+            self._compute_statistics()
+            source = path
+        else:
+            self.build(*vectordb.get_all_chunks())
+            source = f"collection '{config.COLLECTION_NAME}'"
+
+        print(f"BM25 index loaded from {source}: {len(self.ids)} chunks, {len(self.postings)} terms.")
+
+        return self
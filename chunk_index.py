@@ -0,0 +1,114 @@
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import config
+
+
+class ChunkIndex:
+    """
+    In-memory copy of the collection's structure for context expansion:
+    article_num -> (part, section, full article text) and
+    (part, section) -> section chunk texts ordered by chunk_index.
+    Built from the collection or from the sidecar file written at ingestion.
+    """
+
+    def __init__(self):
+        self.articles: Dict[str, Tuple[str, str, str]] = {}
+        self.sections: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+
+    @staticmethod
+    def default_path() -> str:
+        return os.path.join(config.PERSIST_DIR, config.CHUNK_INDEX_FILE)
+
+    def load(self, vectordb=None, path: Optional[str] = None):
+        path = path or self.default_path()
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            articles, sections = self._from_sidecar(data)
+            source = path
+        else:
+            documents, metadatas = vectordb.get_chunks(where=None)
+            articles, sections = self._from_chunks(documents, metadatas)
+            source = f"collection '{config.COLLECTION_NAME}'"
+
+        # swap whole dicts so concurrent readers never see a half-built index
+        self.articles, self.sections = articles, sections
+        print(f"Chunk index loaded from {source}: {len(articles)} articles, {len(sections)} sections.")
+
+        return self
+
+    def save(self, path: Optional[str] = None):
+        path = path or self.default_path()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        data = {
+            "articles": {num: list(value) for num, value in self.articles.items()},
+            "sections": [[part, section, list(texts)] for (part, section), texts in self.sections.items()],
+        }
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_collection(cls, vectordb):
+        index = cls()
+        documents, metadatas = vectordb.get_chunks(where=None)
+        index.articles, index.sections = cls._from_chunks(documents, metadatas)
+
+        return index
+
+    @staticmethod
+    def _from_chunks(documents: List[str], metadatas: List[Dict]):
+        article_chunks = {}
+        section_chunks = {}
+
+        for doc, meta in zip(documents, metadatas):
+            if "article_num" in meta:
+                article_chunks.setdefault(meta["article_num"], (meta["part"], meta["section"], []))[2].append(
+                    (meta.get("chunk_index", 0), doc)
+                )
+            elif "section" in meta and "part" in meta:
+                section_chunks.setdefault((meta["part"], meta["section"]), []).append(
+                    (meta.get("chunk_index", 0), doc)
+                )
+
+        articles = {}
+        for num, (part, section, chunks) in article_chunks.items():
+            chunks.sort(key=lambda x: x[0])
+            articles[num] = (sys.intern(part), sys.intern(section), " ".join(doc for _, doc in chunks).strip())
+
+        sections = {}
+        for (part, section), chunks in section_chunks.items():
+            chunks.sort(key=lambda x: x[0])
+            sections[(sys.intern(part), sys.intern(section))] = tuple(doc for _, doc in chunks)
+
+        return articles, sections
+
+    @staticmethod
+    def _from_sidecar(data: Dict):
+        articles = {
+            num: (sys.intern(part), sys.intern(section), text)
+            for num, (part, section, text) in data["articles"].items()
+        }
+        sections = {
+            (sys.intern(part), sys.intern(section)): tuple(texts)
+            for part, section, texts in data["sections"]
+        }
+
+        return articles, sections
+
+    def get_article(self, article_num: str) -> Optional[Tuple[str, str, str]]:
+        return self.articles.get(article_num)
+
+    def get_section_window(self, part: str, section: str, indices) -> Optional[List[str]]:
+        texts = self.sections.get((part, section))
+        if texts is None:
+            return None
+
+        return [texts[i] for i in indices if 0 <= i < len(texts)]
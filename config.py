@@ -1,8 +1,7 @@
 import os
+import threading
 
 from dotenv import load_dotenv
-from langchain_openai import OpenAIEmbeddings
-from pydantic import SecretStr
 
 load_dotenv()
 
@@ -12,17 +11,104 @@ LAW_NAME = "Кримінальний кодекс України"
 MAX_CHUNKS_TOKENS = 1000
 CHUNK_OVERLAP = 50
 COLLECTION_NAME = "ucc_collection"
+VECTOR_DB_UPLOAD_BATCH_SIZE = 1000  # stays below Chroma's max batch size
+QUERY_EMBEDDING_CACHE_MAX_ENTRIES = 10000  # normalized query -> embedding, shared by all sessions
+QUERY_EMBEDDING_CACHE_TTL_SECONDS = 24 * 60 * 60
+CHUNK_INDEX_FILE = 'chunk_index.json'  # article/section index sidecar, written next to the collection in PERSIST_DIR
+
+# retrieval backend for the API: "chroma" or "numpy" (brute-force search over a memory-mapped matrix
+# exported by ingestion into PERSIST_DIR/NUMPY_STORE_DIR); ingestion always writes to Chroma
+VECTOR_BACKEND = os.environ.get('VECTOR_BACKEND', 'chroma')
+NUMPY_STORE_DIR = 'numpy_store'
+NUMPY_STORE_DTYPE = 'float32'  # "float16" / "int8" (per-vector scale) shrink the matrix 2x / 4x but upcast it on every search
+NUMPY_STORE_DIMENSIONS = None  # e.g. 512: export truncated, renormalised vectors (text-embedding-3 models only)
+
+# hybrid retrieval: BM25 over chunk texts fused with vector search
+HYBRID_SEARCH_ENABLED = True
+BM25_INDEX_FILE = 'bm25_index.json'  # written next to the collection in PERSIST_DIR
+RRF_K = 60  # reciprocal rank fusion constant
+HYBRID_CANDIDATES_MULTIPLIER = 3  # each ranking contributes k * this candidates before fusion
+QUERY_EMBEDDING_TIMEOUT_SECONDS = 5.0  # slower embedding calls fall back to lexical-only retrieval
 NUMBER_OF_RESULTS_TO_RETURN = 5
+CONTEXT_TOKEN_BUDGET = 4000  # tokens of retrieved context per prompt, None -> no limit
+MAX_HISTORY_MESSAGES = 40  # raw messages kept per session, a backstop in case summaries fall behind
+HISTORY_TOKEN_BUDGET = 1500  # tokens of recent turns sent verbatim, older turns go into the rolling summary
+HISTORY_SUMMARY_MAX_WORDS = 200
+
+# chat sessions: "memory" (single process) or "sqlite" (shared by workers on one host)
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'memory')
+SESSION_SQLITE_PATH = './sessions/sessions.sqlite3'
+SESSION_TTL_SECONDS = 2 * 60 * 60  # idle time before a session is evicted
+SESSION_MAX_SESSIONS = 10000
+SESSION_MAX_BYTES = 64 * 1024 * 1024  # serialized history (UTF-8) kept by the in-memory backend
+SESSION_STORE_MAX_WORKERS = 4  # threads running blocking sqlite session calls off the event loop
+
+# semantic answer cache for first-turn questions
+ANSWER_CACHE_ENABLED = True
+ANSWER_CACHE_SIMILARITY_THRESHOLD = 0.95  # cosine similarity between query embeddings
+ANSWER_CACHE_TTL_SECONDS = 24 * 60 * 60
+ANSWER_CACHE_MAX_ENTRIES = 1000
+
+# identical first-turn queries arriving while one is being answered share its retrieval and LLM call
+REQUEST_COALESCING_ENABLED = True
 
 EMBEDDING_MODEL = "text-embedding-3-small"  # or "text-embedding-3-large"
+EMBEDDING_MODEL_DIMENSIONS = {"text-embedding-3-small": 1536, "text-embedding-3-large": 3072, "text-embedding-ada-002": 1536}
+# None -> the model's full width. text-embedding-3 models accept fewer dimensions; changing it requires
+# re-ingesting into a fresh PERSIST_DIR, VectorDB refuses to open a collection of another width
+EMBEDDING_DIMENSIONS = int(os.environ['EMBEDDING_DIMENSIONS']) if os.environ.get('EMBEDDING_DIMENSIONS') else None
+EMBEDDING_BATCH_SIZE = 128  # chunks per embed_documents request during ingestion
+EMBEDDING_MAX_WORKERS = 4  # embedding requests in flight at once
+EMBEDDING_MAX_RETRIES = 5
+EMBEDDING_RETRY_BASE_DELAY = 1.0  # seconds, doubled on every retry
+EMBEDDING_CACHE_PATH = './embedding_cache/embeddings.sqlite3'
+EMBEDDING_CACHE_MAX_ENTRIES = 50000  # ~300 MB of 1536-dim float32 vectors
+PDF_EXTRACTION_MAX_WORKERS = None  # processes extracting page ranges, None -> one per CPU
+PDF_PAGES_PER_TASK = 16
+PDF_PAGE_CACHE_PATH = './ingestion_cache/pdf_pages.sqlite3'  # extracted page text by (file hash, page index)
+PDF_PAGE_CACHE_MAX_FILES = 5
+INGESTION_CHECKPOINT_PATH = './ingestion_cache/checkpoint.json'  # footer and upload progress of an unfinished run
+INGESTION_MAX_PENDING_UPLOADS = 4  # embedded batches queued for the single VectorDB writer
 GPT_MODEL = 'gpt-5-mini'  # "gpt-5"
 
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY') or ValueError("OPENAI_API_KEY is not set in environment variables.")
+OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL')  # None -> api.openai.com; set to point at a proxy or a local fake
+
+# streaming: tokens after the first are merged into frames of up to this many seconds / characters
+STREAM_COALESCE_SECONDS = 0.03
+STREAM_COALESCE_MAX_CHARS = 256
+
+# threads used to run blocking Chroma retrieval off the event loop
+RETRIEVAL_MAX_WORKERS = 8
+
+# EMBEDDER is built on first access so importing config does not load langchain_openai;
+# assigning config.EMBEDDER (benchmarks use a local fake) replaces it
+_embedder_lock = threading.Lock()
+
+
+def make_embedder(**kwargs):
+    from langchain_openai import OpenAIEmbeddings
+    from pydantic import SecretStr
+
+    return OpenAIEmbeddings(
+        model=EMBEDDING_MODEL,
+        api_key=SecretStr(OPENAI_API_KEY),
+        base_url=OPENAI_BASE_URL,
+        dimensions=EMBEDDING_DIMENSIONS,
+        **kwargs
+    )
+
+
+def __getattr__(name):
+    if name == "EMBEDDER":
+        with _embedder_lock:
+            if "EMBEDDER" not in globals():
+                globals()["EMBEDDER"] = make_embedder()
+
+        return globals()["EMBEDDER"]
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-EMBEDDER = OpenAIEmbeddings(
-    model=EMBEDDING_MODEL,
-    api_key=SecretStr(OPENAI_API_KEY),
-)
 
 LEGAL_FOOTER_PROMPT_TEMPLATE = """
 You are an expert in legal documents. Your task is to process the given legal footer text and extract all information into a structured JSON.
@@ -52,3 +138,15 @@ Example JSON format:
   "permanent_link": "…"
 }}
 """
+
+HISTORY_SUMMARY_PROMPT_TEMPLATE = """
+You keep a running summary of a conversation between a user and a legal assistant on the Criminal Code of Ukraine.
+Update the current summary with the new messages. Keep the articles, facts, circumstances and questions the user may
+refer back to; drop greetings and repetition. Write in Ukrainian, at most {max_words} words. Return only the summary.
+
+Current summary:
+{summary}
+
+New messages:
+{transcript}
+"""
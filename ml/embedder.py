@@ -1,8 +1,17 @@
-from typing import List, Dict, Optional
+import hashlib
+import json
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from tqdm import tqdm
 
+from ml.embedding_cache import EmbeddingCache
+from ml.preprocessing.structure_parser import StructureParser
+
 
 class Embedder:
     def __init__(
@@ -11,36 +20,44 @@ class Embedder:
             max_chunk_tokens: int,
             # chunk_overlap: int,
             law_name: str,
-            source_file: str
+            source_file: str,
+            batch_size: int = 128,
+            max_workers: int = 4,
+            max_retries: int = 5,
+            retry_base_delay: float = 1.0,
+            cache: Optional[EmbeddingCache] = None
     ):
         self.embedder = embedder
         self.max_chunk_tokens = max_chunk_tokens
         # self.chunk_overlap = chunk_overlap
         self.law_name = law_name
         self.source_file = source_file
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.cache = cache
 
-    def embed_and_prepare_chunks(
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.max_chunk_tokens,
+            # chunk_overlap=self.chunk_overlap,
+            length_function=len  # length_function(text) → number
+        )
+
+    def prepare_chunks(
             self,
             text: str,
             part: str,
             section_title: str,
             article_num: Optional[str] = None
     ) -> List[Dict]:
-        # split text into chunks
+        # split text into chunks, vectors are filled in later by embed_chunks
 
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.max_chunk_tokens,
-            # chunk_overlap=self.chunk_overlap,
-            length_function=len  # length_function(text) → number
-        )
-
-        chunks = splitter.split_text(text)
+        chunks = self.splitter.split_text(text)
         total_chunks = len(chunks)
         db_chunks = []
 
-        for idx, chunk_text in enumerate(tqdm(chunks)):
-            embedding = self.embedder.embed_query(chunk_text)
-
+        for idx, chunk_text in enumerate(chunks):
             metadata = {
                 "part": part,
                 "section": section_title,
@@ -53,69 +70,128 @@ class Embedder:
                 metadata["article_num"] = article_num
 
             db_chunks.append({
-                "vector": embedding,
+                "id": self.make_chunk_id(part, section_title, article_num, idx, chunk_text, metadata),
+                "vector": None,
                 "page_content": chunk_text,
                 "metadata": metadata
             })
 
         return db_chunks
 
-    def parse_main_structure(self, text, part_pattern, section_pattern, article_pattern) -> List[Dict]:
-
-        db_entries = []
-
-        for part_match in part_pattern.finditer(text):
-            part_start = part_match.start()  # index
-            part_text = part_match.group()
-
-            # print('PART:', part_text)
+    @staticmethod
+    def make_chunk_id(part, section_title, article_num, chunk_index, chunk_text, metadata) -> str:
+        # the same chunk gets the same id in every edition, any change to its text or metadata gives a new one
+        content_hash = hashlib.sha256(
+            (chunk_text + json.dumps(metadata, ensure_ascii=False, sort_keys=True)).encode("utf-8")
+        ).hexdigest()
+        key = "\x1f".join([part, section_title, article_num or "", str(chunk_index), content_hash])
 
-            next_part = part_pattern.search(text, pos=part_start + 1)
-            # pos= means start searching from character index N in the string
-            # part_start + 1 - now the search starts after the first character of the current match, without '+1' will find the same match again.
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
 
-            part_end = next_part.start() if next_part else len(text)
-            # there is another part: end = start of next part. there is no next part: end = end of whole text
+    def embed_chunks(self, db_entries: List[Dict]) -> List[Dict]:
+        # embeds entries in place with batched embed_documents calls, several batches in flight
 
-            for section_match in section_pattern.finditer(text, pos=part_start):
-                section_start = section_match.start()
+        for _ in self.iter_embedded_batches(db_entries):
+            pass
 
-                if section_start >= part_end:  # if this section starts after the end of the current PART → stop
-                    break
-
-                section_title = section_match.group()
-                # print('  SECTION:', section_title)
-
-                next_section = section_pattern.search(text, pos=section_start + 1)
-                section_end = min(
-                    next_section.start() if next_section else len(text),
-                    part_end
-                )
-
-                # it chooses the nearest wall.
-                # [ Section Start ] ---- articles ---- [ Next Section OR Part End ]
+        return db_entries
 
-                for article_match in article_pattern.finditer(text, pos=section_start):
-                    article_start = article_match.start()
+    def iter_embedded_batches(self, db_entries: Iterable[Dict]) -> Iterator[List[Dict]]:
+        # embeds entries in place while they are still being produced and yields every batch whose vectors are set;
+        # at most 2 * max_workers requests are queued, so a slow consumer holds back the producer
+
+        pending = deque()
+        misses = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor, tqdm(unit="chunk") as progress:
+            for group in self._groups(db_entries):
+                if self.cache is None:
+                    misses.extend(group)
+                else:
+                    hits = []
+                    for entry, vector in zip(group, self.cache.get_many([entry["page_content"] for entry in group])):
+                        if vector is None:
+                            misses.append(entry)
+                        else:
+                            entry["vector"] = vector
+                            hits.append(entry)
+
+                    if hits:
+                        progress.update(len(hits))
+                        yield hits
+
+                while len(misses) >= self.batch_size:
+                    batch, misses = misses[:self.batch_size], misses[self.batch_size:]
+                    pending.append((batch, executor.submit(self._embed_entries, batch)))
+
+                    while len(pending) >= 2 * self.max_workers:
+                        yield self._finish_batch(*pending.popleft(), progress)
+
+                while pending and pending[0][1].done():
+                    yield self._finish_batch(*pending.popleft(), progress)
+
+            if misses:
+                pending.append((misses, executor.submit(self._embed_entries, misses)))
+
+            while pending:
+                yield self._finish_batch(*pending.popleft(), progress)
+
+    def _groups(self, db_entries: Iterable[Dict]) -> Iterator[List[Dict]]:
+        group = []
+        for entry in db_entries:
+            group.append(entry)
+            if len(group) == self.batch_size:
+                yield group
+                group = []
+
+        if group:
+            yield group
+
+    def _embed_entries(self, batch: List[Dict]) -> List[List[float]]:
+        return self._embed_batch_with_retry([entry["page_content"] for entry in batch])
+
+    def _finish_batch(self, batch: List[Dict], future, progress) -> List[Dict]:
+        vectors = future.result()
+        for entry, vector in zip(batch, vectors):
+            entry["vector"] = vector
+
+        if self.cache is not None:
+            self.cache.put_many([entry["page_content"] for entry in batch], vectors)
+
+        progress.update(len(batch))
+
+        return batch
+
+    def _embed_batch_with_retry(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.embedder.embed_documents(texts)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+
+                # exponential backoff with jitter so parallel batches do not retry in lockstep
+                delay = self.retry_base_delay * (2 ** attempt) * (1 + random.random())
+                print(f"Embedding batch failed ({e}), retrying in {delay:.1f}s...")
+                time.sleep(delay)
 
-                    if article_start >= section_end:
-                        break
+    def parse_main_structure(self, text, part_pattern, section_pattern, article_pattern) -> List[Dict]:
 
-                    article_num = article_match.group(1)
-                    article_text = article_match.group(2)
+        db_entries = []
 
+        for part in StructureParser.parse_main(text, part_pattern, section_pattern, article_pattern):
+            for section in part.sections:
+                for article in section.articles:
                     full_article_text = (
-                        f"Стаття {article_num}. {article_text}"
+                        f"Стаття {article.number}. {article.title}"
                     )
 
-                    # print('    ARTICLE:', article_num, article_text)
-
                     db_entries.extend(
-                        self.embed_and_prepare_chunks(
+                        self.prepare_chunks(
                             text=full_article_text,
-                            part=part_text,
-                            section_title=section_title,
-                            article_num=article_num
+                            part=part.title,
+                            section_title=section.title,
+                            article_num=article.number
                         )
                     )
 
@@ -125,45 +201,25 @@ class Embedder:
 
         db_entries = []
 
-        for part_match in part_pattern.finditer(text):
-            part_start = part_match.start()
-            part_text = part_match.group()
-
-            next_part = part_pattern.search(text, pos=part_start + 1)
-            part_end = next_part.start() if next_part else len(text)
-
-            for section_match in section_pattern.finditer(text, pos=part_start):
-                section_start = section_match.start()
-                if section_start >= part_end:
-                    break
-
-                section_title = section_match.group(1)
-                section_text = section_match.group(2)
-
+        for part in StructureParser.parse_additional(text, part_pattern, section_pattern):
+            for section in part.sections:
                 db_entries.extend(
-                    self.embed_and_prepare_chunks(
-                        text=section_text,
-                        part=part_text,
-                        section_title=section_title
+                    self.prepare_chunks(
+                        text=section.text,
+                        part=part.title,
+                        section_title=section.title
                     )
                 )
 
         return db_entries
 
-    def embed_footer_part(self, footer_json: Dict) -> List[Dict]:
+    def prepare_footer_part(self, footer_json: Dict) -> List[Dict]:
 
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.max_chunk_tokens,
-            # chunk_overlap=self.chunk_overlap,
-            length_function=len
-        )
-        chunks = splitter.split_text(footer_json['text'])
+        chunks = self.splitter.split_text(footer_json['text'])
         total_chunks = len(chunks)
         db_chunks = []
 
-        for idx, chunk_text in enumerate(tqdm(chunks)):
-            embedding = self.embedder.embed_query(chunk_text)
-
+        for idx, chunk_text in enumerate(chunks):
             metadata = {
                 "act_type": footer_json['act_type'],
                 "act_name": footer_json['act_name'],
@@ -177,7 +233,8 @@ class Embedder:
             }
 
             db_chunks.append({
-                "vector": embedding,
+                "id": self.make_chunk_id("footer", footer_json['act_name'], None, idx, chunk_text, metadata),
+                "vector": None,
                 "metadata": metadata,
                 "page_content": chunk_text
             })
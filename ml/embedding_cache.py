@@ -0,0 +1,103 @@
+import hashlib
+import os
+import sqlite3
+import time
+from array import array
+from typing import List, Optional
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by (embedding model, hash of normalized chunk text).
+    Least recently used entries are evicted once the cache holds more than max_entries vectors.
+    """
+
+    def __init__(self, path: str, model_name: str, max_entries: int):
+        self.path = path
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self.connection.commit()
+
+    def _key(self, text: str) -> str:
+        normalized = " ".join(text.split())
+        return hashlib.sha256(f"{self.model_name}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        keys = [self._key(text) for text in texts]
+        found = {}
+
+        # stay well below SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            batch = keys[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.connection.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                batch
+            )
+            for key, blob in rows:
+                found[key] = array("f", blob).tolist()
+
+        if found:
+            now = time.time()
+            self.connection.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(now, key) for key in found]
+            )
+            self.connection.commit()
+
+        vectors = [found.get(key) for key in keys]
+        self.hits += len(keys) - vectors.count(None)
+        self.misses += vectors.count(None)
+
+        return vectors
+
+    def put_many(self, texts: List[str], vectors: List[List[float]]):
+        now = time.time()
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+            [
+                (self._key(text), array("f", vector).tobytes(), now)
+                for text, vector in zip(texts, vectors)
+            ]
+        )
+        self._evict()
+        self.connection.commit()
+
+    def _evict(self):
+        count = self.connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = count - self.max_entries
+
+        if excess > 0:
+            self.connection.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (excess,)
+            )
+            self.evictions += excess
+
+    def print_stats(self):
+        total = self.hits + self.misses
+        hit_rate = self.hits / total * 100 if total else 0.0
+        print(
+            f"Embedding cache: {self.hits} hits, {self.misses} misses "
+            f"({hit_rate:.1f}% hit rate), {self.evictions} evicted, stored at {self.path}"
+        )
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,68 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+
+class IngestionCheckpoint:
+    """
+    Progress of an unfinished ingestion run, kept in a small JSON file per source file hash:
+    the structured footer returned by the LLM and the number of chunks already upserted.
+    Upserted chunks stay in the collection and paid-for vectors in the EmbeddingCache, so a rerun
+    skips both; the checkpoint saves the footer call and tells where the previous run stopped.
+    The file is removed once a run completes.
+    """
+
+    def __init__(self, path: str, source_hash: str):
+        self.path = path
+        self.resumed = False
+        self._lock = threading.Lock()
+        self.data = {"source_hash": source_hash, "footer_hash": None, "footer": None, "uploaded": 0}
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+
+            if data.get("source_hash") == source_hash:
+                self.data = data
+                self.resumed = True
+
+    @property
+    def uploaded(self) -> int:
+        return self.data["uploaded"]
+
+    def get_footer(self, footer_text: str) -> Optional[Dict]:
+        if self.data["footer_hash"] != self._hash(footer_text):
+            return None
+
+        return self.data["footer"]
+
+    def save_footer(self, footer_text: str, footer_json: Dict):
+        with self._lock:
+            self.data["footer_hash"] = self._hash(footer_text)
+            self.data["footer"] = footer_json
+            self._save()
+
+    def add_uploaded(self, count: int):
+        with self._lock:
+            self.data["uploaded"] += count
+            self._save()
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
@@ -1,34 +1,67 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Set
+
 import config
+from bm25_index import BM25Index
+from chunk_index import ChunkIndex
 from ml.embedder import Embedder
+from ml.embedding_cache import EmbeddingCache
+from ml.ingestion_checkpoint import IngestionCheckpoint
+from ml.pdf_page_cache import PdfPageCache
 from preprocessing.openai_chat_processor import OpenAIChatProcessor
 from preprocessing.legal_text_patterns import LegalTextPatterns
 from preprocessing.text_normalizer import TextNormalizer
 from preprocessing.text_processor import TextProcessor
 from ml.utils import Utils
+from numpy_vector_store import NumpyVectorStore
 from vector_db import VectorDB
 
 
 class IngestionPipeline:
 
-    def __init__(self):
+    def __init__(self, source_file: str = None, openai_chat_processor: OpenAIChatProcessor = None):
+        self.embedding_cache = EmbeddingCache(
+            path=config.EMBEDDING_CACHE_PATH,
+            # vectors of different widths must not be served from the same cache entries
+            model_name=(
+                f"{config.EMBEDDING_MODEL}:{config.EMBEDDING_DIMENSIONS}" if config.EMBEDDING_DIMENSIONS
+                else config.EMBEDDING_MODEL
+            ),
+            max_entries=config.EMBEDDING_CACHE_MAX_ENTRIES
+        )
         self.embedder = Embedder(
             embedder=config.EMBEDDER,
             max_chunk_tokens=config.MAX_CHUNKS_TOKENS,
             # chunk_overlap=config.CHUNK_OVERLAP,
             law_name=config.LAW_NAME,
-            source_file=config.CRIMINAL_CODE_DOC
+            source_file=source_file or config.CRIMINAL_CODE_DOC,
+            batch_size=config.EMBEDDING_BATCH_SIZE,
+            max_workers=config.EMBEDDING_MAX_WORKERS,
+            max_retries=config.EMBEDDING_MAX_RETRIES,
+            retry_base_delay=config.EMBEDDING_RETRY_BASE_DELAY,
+            cache=self.embedding_cache
+        )
+        self.source_file = source_file or config.CRIMINAL_CODE_DOC
+        self.pdf_page_cache = PdfPageCache(
+            path=config.PDF_PAGE_CACHE_PATH,
+            max_files=config.PDF_PAGE_CACHE_MAX_FILES
         )
-        self.source_file = config.CRIMINAL_CODE_DOC
         self.utils = Utils()
         self.text_processor = TextProcessor()
         self.text_normalizer = TextNormalizer()
         self.legal_text_patterns = LegalTextPatterns()
-        self.openAI_chat_processor = OpenAIChatProcessor()
-        self.vectorDB = VectorDB()
+        self.openAI_chat_processor = openai_chat_processor or OpenAIChatProcessor()
+        self.vectorDB = VectorDB(backend="chroma")
 
     def process_pdf(self):
         print("Step 1: Loading PDF text...")
-        raw_text = self.utils.load_pdf_text(self.source_file)
+        raw_text = self.utils.load_pdf_text(
+            self.source_file,
+            max_workers=config.PDF_EXTRACTION_MAX_WORKERS,
+            pages_per_task=config.PDF_PAGES_PER_TASK,
+            cache=self.pdf_page_cache
+        )
         print("PDF loaded, number of characters:", len(raw_text))
 
         print("Step 2: Removing header...")
@@ -43,29 +76,77 @@ class IngestionPipeline:
         first_part, second_part = self.text_processor.split_main_into_2_parts(main_text)
         print(f"First part length: {len(first_part)}, Second part length: {len(second_part)}")
 
-        print("Step 5: Processing footer text with OpenAI...")
-        reformulate_footer_txt = self.openAI_chat_processor.process_footer_text(footer_text)
+        checkpoint = IngestionCheckpoint(config.INGESTION_CHECKPOINT_PATH, PdfPageCache.file_hash(self.source_file))
+        if checkpoint.resumed:
+            print(f"Resuming an interrupted run: {checkpoint.uploaded} chunks were upserted before it stopped.")
+
+        # footer LLM call and VectorDB writes run beside the main text; one writer keeps Chroma upserts serial
+        with ThreadPoolExecutor(max_workers=1) as footer_executor, \
+                ThreadPoolExecutor(max_workers=1) as upload_executor:
+            print("Step 5: Processing footer text with OpenAI in the background...")
+            footer_future = footer_executor.submit(self._process_footer, footer_text, checkpoint)
+
+            existing_ids = self.vectorDB.get_ids()
+            seen_ids = set()
+
+            # steps 6-9 print from _iter_entries, each chunk is embedded and upserted as soon as it is parsed
+            print(f"Steps 6-9: Parsing the main text, embedding and upserting new and changed chunks as they are "
+                  f"parsed, {len(existing_ids)} chunks already in VectorDB...")
+            uploaded = self._embed_and_upload(
+                self._iter_entries(first_part, second_part), existing_ids, seen_ids, upload_executor, checkpoint
+            )
+
+            # the footer goes last so its LLM call never holds back the main text
+            print("Step 10: Preparing footer part, embedding and upserting its new and changed chunks...")
+            footer_entries = self.embedder.prepare_footer_part(footer_future.result())
+            print(f"Footer structure processed, {len(footer_entries)} chunks generated.")
+            uploaded += self._embed_and_upload(footer_entries, existing_ids, seen_ids, upload_executor, checkpoint)
+            print(f"{uploaded} new or changed chunks embedded and upserted.")
+
+        stale_ids = existing_ids - seen_ids
+        print(f"Step 11: Deleting {len(stale_ids)} stale chunks from VectorDB...")
+        self.vectorDB.delete_ids(stale_ids)
+        print("Stale chunks deleted.")
+
+        print("Step 12: Writing chunk index sidecar...")
+        ChunkIndex.from_collection(self.vectorDB).save()
+        print(f"Chunk index written to {ChunkIndex.default_path()}.")
+
+        print("Step 13: Building BM25 lexical index...")
+        BM25Index().build(*self.vectorDB.get_all_chunks()).save()
+        print(f"BM25 index written to {BM25Index.default_path()}.")
+
+        print("Step 14: Exporting vectors for the NumPy backend...")
+        self.vectorDB.export_numpy_store()
+        print(f"Vectors written to {NumpyVectorStore.default_dir()}. Call POST /index/reload on running servers.")
+
+        checkpoint.clear()
+        self.pdf_page_cache.print_stats()
+        self.embedding_cache.print_stats()
+
+        print("Pipeline completed successfully!")
+
+    def _process_footer(self, footer_text: str, checkpoint: IngestionCheckpoint) -> Dict:
+        footer_json = checkpoint.get_footer(footer_text)
+        if footer_json is not None:
+            print("Footer restored from checkpoint.")
+            return footer_json
+
+        footer_json = self.openAI_chat_processor.process_footer_text(footer_text)
+        checkpoint.save_footer(footer_text, footer_json)
         print("Footer processed and structured.")
 
+        return footer_json
+
+    def _iter_entries(self, first_part: str, second_part: str) -> Iterator[Dict]:
+        # parsed chunks are handed to the embedding stage part by part
         print("Step 6: Normalizing first part of main text...")
-        norm_first_part = self.text_normalizer.enforce_headings(
-            self.text_normalizer.fix_line_breaks(
-                self.text_normalizer.normalize_apostrophes(first_part)
-            )
-        )
+        norm_first_part = self.text_normalizer.normalize(first_part)
         print("Step 6.1: Adding last fake article because the pattern cut the last article...")
         norm_first_part += "\nСтаття 999. Кінець документа"
         print("First part normalized.")
 
-        print("Step 7: Normalizing second part of main text...")
-        norm_second_part = self.text_normalizer.enforce_headings(
-            self.text_normalizer.fix_line_breaks(
-                self.text_normalizer.normalize_apostrophes(second_part)
-            )
-        )
-        print("Second part normalized.")
-
-        print("Step 8: Parsing main structure and generating embeddings...")
+        print("Step 7: Parsing main structure...")
         main_entries = self.embedder.parse_main_structure(
             norm_first_part,
             self.legal_text_patterns.PART_PATTERN,
@@ -73,32 +154,43 @@ class IngestionPipeline:
             self.legal_text_patterns.ARTICLE_PATTERN_MAIN_PART
         )
         print(f"Main structure processed, {len(main_entries)} chunks generated.")
+        yield from main_entries
 
-        print("Step 9: Parsing additional structure and generating embeddings...")
+        print("Step 8: Normalizing second part of main text...")
+        norm_second_part = self.text_normalizer.normalize(second_part)
+        print("Second part normalized.")
+
+        print("Step 9: Parsing additional structure...")
         additional_entries = self.embedder.parse_additional_structure(
             norm_second_part,
             self.legal_text_patterns.PART_PATTERN,
             self.legal_text_patterns.SECTION_PATTERN_ADDITIONAL_PART
         )
         print(f"Additional structure processed, {len(additional_entries)} chunks generated.")
+        yield from additional_entries
 
-        print("Step 10: Embedding footer part...")
-        footer_entries = self.embedder.embed_footer_part(reformulate_footer_txt)
-        print(f"Footer structure processed, {len(footer_entries)} chunks generated.")
+    def _embed_and_upload(self, db_entries: Iterable[Dict], existing_ids: Set[str], seen_ids: Set[str],
+                          upload_executor: ThreadPoolExecutor, checkpoint: IngestionCheckpoint) -> int:
+        # every embedded batch is upserted right away, at most INGESTION_MAX_PENDING_UPLOADS wait for the writer
+        new_entries = self.vectorDB.iter_new_entries(db_entries, existing_ids, seen_ids)
+        uploads = deque()
+        uploaded = 0
 
-        print("Step 11: Uploading main entries to VectorDB...")
-        self.vectorDB.upload_data(main_entries)
-        print("Main entries uploaded.")
+        for batch in self.embedder.iter_embedded_batches(new_entries):
+            uploads.append(upload_executor.submit(self._upload_batch, batch, checkpoint))
+            uploaded += len(batch)
 
-        print("Step 12: Uploading additional entries to VectorDB...")
-        self.vectorDB.upload_data(additional_entries)
-        print("Additional entries uploaded.")
+            while len(uploads) > config.INGESTION_MAX_PENDING_UPLOADS:
+                uploads.popleft().result()
 
-        print("Step 13: Uploading footer entries to VectorDB...")
-        self.vectorDB.upload_data(footer_entries)
-        print("Footer entries uploaded.")
+        while uploads:
+            uploads.popleft().result()
 
-        print("Pipeline completed successfully!")
+        return uploaded
+
+    def _upload_batch(self, batch: List[Dict], checkpoint: IngestionCheckpoint):
+        self.vectorDB.upload_data(batch)
+        checkpoint.add_uploaded(len(batch))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,75 @@
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Dict
+
+import pypdf
+
+
+class PdfPageCache:
+    """
+    Persistent cache of extracted page text keyed by (file hash, page index).
+    The file hash includes the pypdf version, since extraction output can change between releases.
+    Pages of the least recently used files are dropped once more than max_files files are cached.
+    """
+
+    def __init__(self, path: str, max_files: int):
+        self.path = path
+        self.max_files = max_files
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "file_hash TEXT NOT NULL, page_index INTEGER NOT NULL, text TEXT NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (file_hash, page_index))"
+        )
+        self.connection.commit()
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        digest = hashlib.sha256(f"pypdf {pypdf.__version__}\0".encode("utf-8"))
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+
+        return digest.hexdigest()
+
+    def get_pages(self, file_hash: str) -> Dict[int, str]:
+        pages = dict(self.connection.execute(
+            "SELECT page_index, text FROM pages WHERE file_hash = ?", (file_hash,)
+        ))
+
+        if pages:
+            self.connection.execute("UPDATE pages SET last_used = ? WHERE file_hash = ?", (time.time(), file_hash))
+            self.connection.commit()
+
+        return pages
+
+    def put_pages(self, file_hash: str, pages: Dict[int, str]):
+        now = time.time()
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO pages (file_hash, page_index, text, last_used) VALUES (?, ?, ?, ?)",
+            [(file_hash, index, text, now) for index, text in pages.items()]
+        )
+        self._evict()
+        self.connection.commit()
+
+    def _evict(self):
+        self.connection.execute(
+            "DELETE FROM pages WHERE file_hash IN ("
+            "SELECT file_hash FROM pages GROUP BY file_hash ORDER BY MAX(last_used) DESC LIMIT -1 OFFSET ?)",
+            (self.max_files,)
+        )
+
+    def print_stats(self):
+        print(f"PDF page cache: {self.hits} pages reused, {self.misses} pages extracted, stored at {self.path}")
+
+    def close(self):
+        self.connection.close()
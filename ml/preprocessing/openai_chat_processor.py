@@ -1,4 +1,5 @@
 from langchain_classic.chains import ConversationChain
+from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import SystemMessage
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain_openai import ChatOpenAI
@@ -10,12 +11,13 @@ from ml.schemas import LegalFooterModel
 
 class OpenAIChatProcessor:
 
-    def __init__(self):
+    def __init__(self, llm: BaseChatModel = None):
         self.api_key = SecretStr(config.OPENAI_API_KEY)
         self.model_name = config.GPT_MODEL
-        self.llm = ChatOpenAI(
+        self.llm = llm or ChatOpenAI(
             model=self.model_name,
-            api_key=self.api_key
+            api_key=self.api_key,
+            base_url=config.OPENAI_BASE_URL
         )
 
         self.parser = PydanticOutputParser(pydantic_object=LegalFooterModel)
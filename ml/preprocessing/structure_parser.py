@@ -0,0 +1,88 @@
+from bisect import bisect_left
+from typing import List
+
+from ml.schemas import ArticleNode, PartNode, SectionNode
+
+
+class StructureParser:
+    """
+    Turns normalized text into a Part -> Section -> Article tree with character offsets.
+    Every pattern runs over the text once and the matches are merged by offset,
+    instead of searching again from every part and section start.
+    """
+
+    @staticmethod
+    def parse_main(text: str, part_pattern, section_pattern, article_pattern) -> List[PartNode]:
+        parts = StructureParser._parts(text, part_pattern)
+        section_matches = list(section_pattern.finditer(text))
+        section_starts = [match.start() for match in section_matches]
+        article_matches = list(article_pattern.finditer(text))
+        article_starts = [match.start() for match in article_matches]
+
+        for part in parts:
+            first = bisect_left(section_starts, part.start)
+            last = bisect_left(section_starts, part.end)
+
+            for i in range(first, last):
+                match = section_matches[i]
+                next_match = section_matches[i + 1] if i + 1 < len(section_matches) else None
+                section = SectionNode(
+                    title=match.group(),
+                    start=match.start(),
+                    end=min(StructureParser._next_section_start(text, match, next_match), part.end),
+                )
+
+                # an article belongs to the section its header starts in, its body may run past it
+                for j in range(bisect_left(article_starts, section.start), bisect_left(article_starts, section.end)):
+                    article = article_matches[j]
+                    section.articles.append(ArticleNode(
+                        number=article.group(1),
+                        title=article.group(2),
+                        start=article.start(),
+                        end=article.end(),
+                    ))
+
+                part.sections.append(section)
+
+        return parts
+
+    @staticmethod
+    def parse_additional(text: str, part_pattern, section_pattern) -> List[PartNode]:
+        parts = StructureParser._parts(text, part_pattern)
+        section_matches = list(section_pattern.finditer(text))
+        section_starts = [match.start() for match in section_matches]
+
+        for part in parts:
+            for i in range(bisect_left(section_starts, part.start), bisect_left(section_starts, part.end)):
+                match = section_matches[i]
+                part.sections.append(SectionNode(
+                    title=match.group(1),
+                    text=match.group(2),
+                    start=match.start(),
+                    end=match.end(),
+                ))
+
+        return parts
+
+    @staticmethod
+    def _parts(text: str, part_pattern) -> List[PartNode]:
+        matches = list(part_pattern.finditer(text))
+
+        return [
+            PartNode(
+                title=match.group(),
+                start=match.start(),
+                end=matches[i + 1].start() if i + 1 < len(matches) else len(text),
+            )
+            for i, match in enumerate(matches)
+        ]
+
+    @staticmethod
+    def _next_section_start(text: str, match, next_match) -> int:
+        # a header preceded by blank lines matches again one line lower, and that is
+        # where the original search from start + 1 closed the section, keep that boundary
+        newline = text.find("\n", match.start(), match.start(1))
+        if newline != -1:
+            return newline + 1
+
+        return next_match.start() if next_match else len(text)
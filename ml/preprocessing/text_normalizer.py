@@ -2,6 +2,29 @@ import re
 
 
 class TextNormalizer:
+    # Rules are compiled once. Several are rewritten into equivalent forms the regex engine can
+    # search quickly (a literal first character instead of a leading \s* or \w+); the original
+    # chain is kept in tests/legacy_text_normalizer.py and tests/test_text_normalizer.py checks
+    # the output against it byte for byte.
+
+    ARTICLE_HEADER_PATTERN = re.compile(r"(Стаття\s+\d+(?:-\d+)?\.)")
+    # searched from the hyphen; the word before it is checked in _join_hyphenated_words
+    HYPHENATED_WORD_PATTERN = re.compile(r"-\s*\n\s*(\w+)")
+    WORD_CHARACTER_PATTERN = re.compile(r"\w")
+    MID_SENTENCE_BREAK_PATTERN = re.compile(
+        r"(?<=[^\n])\n(?!\s*(?:Стаття\s+\d+|Розділ\s+[IVXLC]+|ЗАГАЛЬНА ЧАСТИНА|ОСОБЛИВА ЧАСТИНА))"
+    )
+    REPEATED_SPACES_PATTERN = re.compile(r"  +")
+
+    # the leading \s* of these heading rules is applied by _sub_after_whitespace
+    MAJOR_PART_PATTERN = re.compile(r"(ЗАГАЛЬНА ЧАСТИНА|ОСОБЛИВА ЧАСТИНА|ПЕРЕХІДНІ ТА ПРИКІНЦЕВІ ПОЛОЖЕННЯ)\s*")
+    SECTION_PATTERN = re.compile(r"(Розділ [IVXLC]+(?:\s*-\s*\d+)?)\s*\.?\s*")
+    TITLED_ARTICLE_PATTERN = re.compile(r"(Стаття \d+[-\d]*\.)\s+([А-ЯІЇЄҐ])")
+
+    SECTION_TITLE_PATTERN = re.compile(r"([А-ЯІЇЄҐ][А-ЯІЇЄҐ\s,]{3,})\s+(Стаття|\{)")
+    ARTICLE_AFTER_NOTE_PATTERN = re.compile(r"(\})\s*(Стаття \d+[-\d]*\.\s+[А-ЯІЇЄҐА-я])")
+    BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+
     @staticmethod
     def normalize_apostrophes(text: str) -> str:
         text = text.replace("'", "’")
@@ -9,56 +32,111 @@ class TextNormalizer:
 
         return text
 
+    @staticmethod
+    def normalize(text: str) -> str:
+        return TextNormalizer.enforce_headings(
+            TextNormalizer.fix_line_breaks(
+                TextNormalizer.normalize_apostrophes(text)
+            )
+        )
+
     @staticmethod
     def fix_line_breaks(text: str) -> str:
         # PROTECT article headers FIRST (THIS WAS MISSING)
-        text = re.sub(
-            r"(Стаття\s+\d+(?:-\d+)?\.)",
-            r"\n\1\n",
-            text
-        )
+        text = TextNormalizer.ARTICLE_HEADER_PATTERN.sub(r"\n\1\n", text)
 
         # Fix hyphenated words split over lines
-        text = re.sub(r"(\w+)-\s*\n\s*(\w+)", r"\1-\2", text)
+        text = TextNormalizer._join_hyphenated_words(text)
 
         # Join lines broken mid-sentence (now SAFE)
-        text = re.sub(
-            r"([^\n])\n(?!\s*(Стаття\s+\d+|Розділ\s+[IVXLC]+|ЗАГАЛЬНА ЧАСТИНА|ОСОБЛИВА ЧАСТИНА))",
-            r"\1 ",
-            text
-        )
+        text = TextNormalizer.MID_SENTENCE_BREAK_PATTERN.sub(" ", text)
 
         # Clean up spaces
-        text = re.sub(r" +\n", "\n", text)
-        text = re.sub(r"\n +", "\n", text)
-        text = re.sub(r"  +", " ", text)
+        text = TextNormalizer._strip_spaces_around_newlines(text)
+        text = TextNormalizer.REPEATED_SPACES_PATTERN.sub(" ", text)
 
         return text
 
     @staticmethod
     def enforce_headings(text: str) -> str:
         # Major parts
-        text = re.sub(r"\s*(ЗАГАЛЬНА ЧАСТИНА|ОСОБЛИВА ЧАСТИНА|ПЕРЕХІДНІ ТА ПРИКІНЦЕВІ ПОЛОЖЕННЯ)\s*", r"\n\n\1\n\n",
-                      text)
+        text = TextNormalizer._sub_after_whitespace(TextNormalizer.MAJOR_PART_PATTERN, r"\n\n\1\n\n", text)
 
         # Normalize article numbers like "336 - 1" → "336-1"
-        text = re.sub(
-            r"(Стаття\s+\d+(?:-\d+)?\.)",
-            r"\n\1\n",
-            text
-        )
+        text = TextNormalizer.ARTICLE_HEADER_PATTERN.sub(r"\n\1\n", text)
 
         # Sections (only if NOT preceded by "{")
-        text = re.sub(r"(?<!\{)\s*(Розділ [IVXLC]+(?:\s*-\s*\d+)?)\s*\.?\s*", r"\n\1\n", text)
+        text = TextNormalizer._sub_after_whitespace(TextNormalizer.SECTION_PATTERN, r"\n\1\n", text, not_after="{")
 
         # Section titles (ALL CAPS) - ensure they're on their own line
-        text = re.sub(r"([А-ЯІЇЄҐ][А-ЯІЇЄҐ\s,]{3,})\s+(Стаття|\{)", r"\1\n\n\2", text)
+        text = TextNormalizer.SECTION_TITLE_PATTERN.sub(r"\1\n\n\2", text)
 
         # Articles - newline before Стаття that has a title (not just deletion notes)
-        text = re.sub(r"(\})\s*(Стаття \d+[-\d]*\.\s+[А-ЯІЇЄҐА-я])", r"\1\n\2", text)
-        text = re.sub(r"\s*(Стаття \d+[-\d]*\.)\s+([А-ЯІЇЄҐ])", r"\n\1 \2", text)
+        text = TextNormalizer.ARTICLE_AFTER_NOTE_PATTERN.sub(r"\1\n\2", text)
+        text = TextNormalizer._sub_after_whitespace(TextNormalizer.TITLED_ARTICLE_PATTERN, r"\n\1 \2", text)
 
         # Cleanup
-        text = re.sub(r"\n{3,}", "\n\n", text)
+        text = TextNormalizer.BLANK_LINES_PATTERN.sub("\n\n", text)
 
         return text.strip()
+
+    @staticmethod
+    def _join_hyphenated_words(text: str) -> str:
+        # re.sub(r"(\w+)-\s*\n\s*(\w+)", r"\1-\2", text): the word before the hyphen must not
+        # belong to the previous join, whose second word is always taken whole
+        parts = []
+        last_end = 0
+
+        for match in TextNormalizer.HYPHENATED_WORD_PATTERN.finditer(text):
+            start = match.start()
+            if start - 1 < last_end or not TextNormalizer.WORD_CHARACTER_PATTERN.match(text, start - 1):
+                continue
+
+            parts.append(text[last_end:start])
+            parts.append("-")
+            parts.append(match.group(1))
+            last_end = match.end()
+
+        parts.append(text[last_end:])
+
+        return "".join(parts)
+
+    @staticmethod
+    def _strip_spaces_around_newlines(text: str) -> str:
+        # re.sub(r" +\n", "\n") followed by re.sub(r"\n +", "\n"): spaces are trimmed at the end
+        # of every line but the last and at the start of every line but the first
+        lines = text.split("\n")
+        if len(lines) == 1:
+            return text
+
+        lines[0] = lines[0].rstrip(" ")
+        for i in range(1, len(lines) - 1):
+            lines[i] = lines[i].strip(" ")
+        lines[-1] = lines[-1].lstrip(" ")
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def _sub_after_whitespace(pattern, replacement, text, not_after=None):
+        # same result as re.sub(r"(?<!not_after)\s*" + pattern.pattern, replacement, text) for a pattern
+        # that starts with a non-whitespace character: every match also swallows the whitespace run
+        # before it, but never text consumed by the previous match
+        parts = []
+        last_end = 0
+
+        for match in pattern.finditer(text):
+            start = match.start()
+            run_start = last_end + len(text[last_end:start].rstrip())
+
+            if not_after is not None and run_start > 0 and text[run_start - 1] == not_after:
+                if run_start == start:
+                    continue  # the lookbehind fails and there is no whitespace to start after
+                run_start += 1
+
+            parts.append(text[last_end:run_start])
+            parts.append(match.expand(replacement))
+            last_end = match.end()
+
+        parts.append(text[last_end:])
+
+        return "".join(parts)
@@ -1,5 +1,9 @@
 from .legal_footer_model import LegalFooterModel
+from .legal_structure import ArticleNode, PartNode, SectionNode
 
 __all__ = [
     "LegalFooterModel",
+    "ArticleNode",
+    "PartNode",
+    "SectionNode",
 ]
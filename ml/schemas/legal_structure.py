@@ -0,0 +1,25 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ArticleNode(BaseModel):
+    number: str = Field(..., description="Article number, e.g. 185 or 110-2")
+    title: str = Field(..., description="Heading line of the article")
+    start: int = Field(..., description="Offset of the article match in the normalized text")
+    end: int = Field(..., description="Offset where the article match ends")
+
+
+class SectionNode(BaseModel):
+    title: str = Field(..., description="Section header as matched")
+    start: int = Field(..., description="Offset of the section match in the normalized text")
+    end: int = Field(..., description="Offset where the section ends")
+    text: Optional[str] = Field(None, description="Section body, for parts without articles")
+    articles: List[ArticleNode] = Field(default_factory=list)
+
+
+class PartNode(BaseModel):
+    title: str = Field(..., description="Part header, e.g. ОСОБЛИВА ЧАСТИНА")
+    start: int = Field(..., description="Offset of the part header in the normalized text")
+    end: int = Field(..., description="Offset of the next part header or the end of the text")
+    sections: List[SectionNode] = Field(default_factory=list)
@@ -1,16 +1,84 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
 from pypdf import PdfReader
 
+from ml.pdf_page_cache import PdfPageCache
+
+
+def _extract_pages(reader: PdfReader, start: int, stop: int) -> List[str]:
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> List[str]:
+    # runs in a worker process: every worker opens its own reader
+    return _extract_pages(PdfReader(path), start, stop)
+
 
 class Utils:
     @staticmethod
-    def load_pdf_text(path: str) -> str:
+    def load_pdf_text(
+            path: str,
+            max_workers: Optional[int] = None,
+            pages_per_task: int = 16,
+            cache: Optional[PdfPageCache] = None
+    ) -> str:
+        return '\n'.join(Utils.iter_pdf_pages(path, max_workers, pages_per_task, cache))
 
+    @staticmethod
+    def iter_pdf_pages(
+            path: str,
+            max_workers: Optional[int] = None,
+            pages_per_task: int = 16,
+            cache: Optional[PdfPageCache] = None
+    ) -> Iterator[str]:
+        # yields the text of every non-empty page in order, as soon as that page is available.
+        # cached pages are never re-extracted, the rest is split into page ranges for a process pool
         reader = PdfReader(path)
-        pages = []
+        page_count = len(reader.pages)
+        max_workers = max_workers or os.cpu_count() or 1
+
+        file_hash = cache.file_hash(path) if cache is not None else None
+        pages = cache.get_pages(file_hash) if cache is not None else {}
+        pages = {index: text for index, text in pages.items() if index < page_count}
+
+        missing = [index for index in range(page_count) if index not in pages]
+        ranges = []
+        for index in missing:
+            if ranges and ranges[-1][1] == index and ranges[-1][1] - ranges[-1][0] < pages_per_task:
+                ranges[-1][1] = index + 1
+            else:
+                ranges.append([index, index + 1])
+
+        if cache is not None:
+            cache.hits += page_count - len(missing)
+            cache.misses += len(missing)
+
+        executor = ProcessPoolExecutor(max_workers=max_workers) if max_workers > 1 and len(ranges) > 1 else None
+        extracted = {}
+
+        try:
+            futures = {}
+            for start, stop in ranges:
+                if executor is not None:
+                    futures[start] = executor.submit(_extract_page_range, path, start, stop)
+
+            range_by_page = {index: (start, stop) for start, stop in ranges for index in range(start, stop)}
+
+            for index in range(page_count):
+                if index in range_by_page and index not in pages:
+                    start, stop = range_by_page[index]
+                    texts = futures[start].result() if executor is not None else _extract_pages(reader, start, stop)
+                    new_pages = dict(zip(range(start, stop), texts))
+                    pages.update(new_pages)
+                    extracted.update(new_pages)
 
-        for page in reader.pages:
-            text = page.extract_text()
-            if text:
-                pages.append(text)
+                if pages[index]:
+                    yield pages[index]
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
 
-        return '\n'.join(pages)
+            if cache is not None and extracted:
+                cache.put_pages(file_hash, extracted)
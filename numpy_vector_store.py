@@ -0,0 +1,176 @@
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+import config
+
+
+class NumpyVectorStore:
+    """
+    Whole-corpus retrieval engine: every chunk embedding lives in one contiguous matrix
+    (memory-mapped from PERSIST_DIR) with unit-length rows, so a search is a single
+    matrix-vector product. Metadata filters run on precomputed per-field code arrays.
+    Rows are stored as float32, float16 or int8 with a per-row scale, optionally
+    truncated to fewer dimensions.
+    """
+
+    VECTORS_FILE = "vectors.npy"
+    SCALES_FILE = "scales.npy"
+    CHUNKS_FILE = "chunks.json"
+    SCORE_BLOCK_ROWS = 4096
+
+    def __init__(self):
+        self.matrix: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[Dict] = []
+        self._columns: Dict[str, Tuple[Dict, np.ndarray]] = {}
+
+    @staticmethod
+    def default_dir() -> str:
+        return os.path.join(config.PERSIST_DIR, config.NUMPY_STORE_DIR)
+
+    @classmethod
+    def write(cls, ids: List[str], texts: List[str], metadatas: List[Dict], vectors, dtype: str = "float32",
+              dimensions: Optional[int] = None, directory: Optional[str] = None):
+        directory = directory or cls.default_dir()
+        os.makedirs(directory, exist_ok=True)
+
+        # text-embedding-3 vectors may be truncated and renormalised, like the API's dimensions parameter
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)[:, :dimensions]
+        matrix = cls._normalize(matrix)
+
+        scales = None
+        if dtype == "int8":
+            # symmetric scalar quantization, one scale per row: row ~= codes * scale
+            scales = np.maximum(np.abs(matrix).max(axis=1), 1e-12) / 127
+            matrix = np.round(matrix / scales[:, None]).astype(np.int8)
+        else:
+            matrix = matrix.astype(dtype)
+
+        cls._save_array(os.path.join(directory, cls.VECTORS_FILE), matrix)
+
+        scales_path = os.path.join(directory, cls.SCALES_FILE)
+        if scales is not None:
+            cls._save_array(scales_path, scales.astype(np.float32))
+        elif os.path.exists(scales_path):
+            os.remove(scales_path)
+
+        chunks_path = os.path.join(directory, cls.CHUNKS_FILE)
+        with open(chunks_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"ids": ids, "texts": texts, "metadatas": metadatas}, f, ensure_ascii=False,
+                      separators=(",", ":"))
+        os.replace(chunks_path + ".tmp", chunks_path)
+
+    @staticmethod
+    def _save_array(path: str, array: np.ndarray):
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, array)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def load(self, directory: Optional[str] = None):
+        directory = directory or self.default_dir()
+
+        self.matrix = np.load(os.path.join(directory, self.VECTORS_FILE), mmap_mode="r")
+        scales_path = os.path.join(directory, self.SCALES_FILE)
+        self.scales = np.load(scales_path) if os.path.exists(scales_path) else None
+        with open(os.path.join(directory, self.CHUNKS_FILE), encoding="utf-8") as f:
+            data = json.load(f)
+        self.ids, self.texts, self.metadatas = data["ids"], data["texts"], data["metadatas"]
+
+        # one integer code array per metadata field: equality and $in filters become vector comparisons
+        columns = {}
+        for row, metadata in enumerate(self.metadatas):
+            for key, value in metadata.items():
+                vocabulary, codes = columns.setdefault(key, ({}, np.full(len(self.metadatas), -1, dtype=np.int32)))
+                codes[row] = vocabulary.setdefault(value, len(vocabulary))
+        self._columns = columns
+
+        print(f"NumPy vector store loaded from {directory}: {self.matrix.shape[0]} chunks, "
+              f"{self.matrix.shape[1]} dims, {self.matrix.dtype}, {self.matrix.nbytes / 2 ** 20:.1f} MB.")
+
+        return self
+
+    def count(self) -> int:
+        return 0 if self.matrix is None else self.matrix.shape[0]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 5,
+                                    where: Optional[Dict] = None) -> List[Document]:
+        return self.similarity_search_by_vectors([embedding], k, where)[0]
+
+    def similarity_search_by_vectors(self, embeddings: List[List[float]], k: int = 5,
+                                     where: Optional[Dict] = None) -> List[List[Document]]:
+        # full-width query vectors are truncated to the stored width before normalising
+        queries = self._normalize(np.asarray(embeddings, dtype=np.float32)[:, :self.matrix.shape[1]])
+
+        scores = self._scores(queries)  # (n_queries, n_chunks)
+        if where:
+            scores[:, ~self._mask(where)] = -np.inf
+
+        k = min(k, scores.shape[1])
+        if k == 0:
+            return [[] for _ in embeddings]
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+        results = []
+        for row, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-scores[row, candidates])]
+            results.append([self._document(i) for i in ordered if np.isfinite(scores[row, i])])
+
+        return results
+
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        if self.matrix.dtype == np.float32:
+            return queries @ self.matrix.T
+
+        # numpy has no BLAS kernel for float16 / int8: upcast a block of rows at a time instead
+        scores = np.empty((queries.shape[0], self.matrix.shape[0]), dtype=np.float32)
+        for start in range(0, self.matrix.shape[0], self.SCORE_BLOCK_ROWS):
+            block = self.matrix[start:start + self.SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + block.shape[0]] = queries @ block.T
+
+        if self.scales is not None:
+            scores *= self.scales
+
+        return scores
+
+    def get(self, where: Optional[Dict] = None) -> Tuple[List[str], List[str], List[Dict]]:
+        rows = np.flatnonzero(self._mask(where)) if where else range(len(self.ids))
+
+        return (
+            [self.ids[i] for i in rows],
+            [self.texts[i] for i in rows],
+            [self.metadatas[i] for i in rows],
+        )
+
+    def _document(self, row: int) -> Document:
+        return Document(id=self.ids[row], page_content=self.texts[row], metadata=self.metadatas[row])
+
+    def _mask(self, where: Dict) -> np.ndarray:
+        # supports the Chroma where subset the app uses: $and, $or, $eq, $ne, $in, $nin and bare equality
+        if "$and" in where:
+            return np.logical_and.reduce([self._mask(condition) for condition in where["$and"]])
+        if "$or" in where:
+            return np.logical_or.reduce([self._mask(condition) for condition in where["$or"]])
+
+        (key, condition), = where.items()
+        operator, value = next(iter(condition.items())) if isinstance(condition, dict) else ("$eq", condition)
+
+        vocabulary, codes = self._columns.get(key, ({}, np.full(len(self.ids), -1, dtype=np.int32)))
+
+        if operator in ("$in", "$nin"):
+            mask = np.isin(codes, [vocabulary[v] for v in value if v in vocabulary])
+        else:
+            mask = codes == vocabulary.get(value, -2)
+
+        return ~mask if operator in ("$ne", "$nin") else mask
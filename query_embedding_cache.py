@@ -0,0 +1,58 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU map of normalized query -> embedding vector with an idle TTL (an entry
+    expires ttl_seconds after it was last used), shared by every session of the process. Counts hits, misses and time spent in the embedding API.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.embedding_seconds = 0.0
+
+        self._entries = OrderedDict()  # key -> (last_used, vector)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        query = query.replace("'", "’").replace("ʼ", "’")
+        query = re.sub(r"\s+", " ", query).strip().rstrip("?!. ")
+
+        return query.casefold()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            now = time.monotonic()
+            if entry is not None and now - entry[0] <= self.ttl_seconds:
+                self._entries[key] = (now, entry[1])
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if entry is not None:
+                del self._entries[key]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, vector: List[float], embedding_seconds: float):
+        with self._lock:
+            self.embedding_seconds += embedding_seconds
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def size(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,65 @@
+"""
+Reference copy of the original nested finditer loops behind StructureParser, and
+a generator of random documents assembled from headings and filler lines.
+Shared by the regression test and benchmarks/bench_structure_parser.py.
+"""
+import random
+
+FUZZ_LINES = [
+    "ЗАГАЛЬНА ЧАСТИНА", "ОСОБЛИВА ЧАСТИНА", "ПРИКІНЦЕВІ ТА ПЕРЕХІДНІ ПОЛОЖЕННЯ",
+    "Розділ I", "Розділ IV", " Розділ XII ", "Розділ II цього Кодексу",
+    "Стаття 1. Завдання", "Стаття 2.", "Стаття 110-2. Фінансування", "  Стаття 3. Чинність",
+    "{Розділ V виключено}", "1. Особа підлягає відповідальності.", "", "", "текст ОСОБЛИВА ЧАСТИНА текст",
+]
+
+
+class LegacyStructureParser:
+    # reference copy of the original loops from Embedder, returning plain tuples
+
+    @staticmethod
+    def parse_main(text, part_pattern, section_pattern, article_pattern):
+        entries = []
+
+        for part_match in part_pattern.finditer(text):
+            part_start = part_match.start()
+            next_part = part_pattern.search(text, pos=part_start + 1)
+            part_end = next_part.start() if next_part else len(text)
+
+            for section_match in section_pattern.finditer(text, pos=part_start):
+                section_start = section_match.start()
+                if section_start >= part_end:
+                    break
+
+                next_section = section_pattern.search(text, pos=section_start + 1)
+                section_end = min(next_section.start() if next_section else len(text), part_end)
+
+                for article_match in article_pattern.finditer(text, pos=section_start):
+                    if article_match.start() >= section_end:
+                        break
+
+                    entries.append((
+                        part_match.group(), section_match.group(), article_match.group(1), article_match.group(2)
+                    ))
+
+        return entries
+
+    @staticmethod
+    def parse_additional(text, part_pattern, section_pattern):
+        entries = []
+
+        for part_match in part_pattern.finditer(text):
+            part_start = part_match.start()
+            next_part = part_pattern.search(text, pos=part_start + 1)
+            part_end = next_part.start() if next_part else len(text)
+
+            for section_match in section_pattern.finditer(text, pos=part_start):
+                if section_match.start() >= part_end:
+                    break
+
+                entries.append((part_match.group(), section_match.group(1), None, section_match.group(2)))
+
+        return entries
+
+
+def fuzz_document(rng: random.Random) -> str:
+    return "\n".join(rng.choice(FUZZ_LINES) for _ in range(rng.randint(1, 80)))
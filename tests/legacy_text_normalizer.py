@@ -0,0 +1,67 @@
+"""
+Reference copy of the original re.sub chain behind TextNormalizer, and a
+generator of random fragments built from the tokens the rules react to.
+Shared by the regression test and benchmarks/bench_text_normalizer.py.
+"""
+import random
+import re
+
+
+class LegacyTextNormalizer:
+    # reference copy of the original chain
+
+    @staticmethod
+    def normalize_apostrophes(text: str) -> str:
+        text = text.replace("'", "’")
+        text = text.replace("ʼ", "’")
+
+        return text
+
+    @staticmethod
+    def fix_line_breaks(text: str) -> str:
+        text = re.sub(r"(Стаття\s+\d+(?:-\d+)?\.)", r"\n\1\n", text)
+        text = re.sub(r"(\w+)-\s*\n\s*(\w+)", r"\1-\2", text)
+        text = re.sub(
+            r"([^\n])\n(?!\s*(Стаття\s+\d+|Розділ\s+[IVXLC]+|ЗАГАЛЬНА ЧАСТИНА|ОСОБЛИВА ЧАСТИНА))",
+            r"\1 ",
+            text
+        )
+        text = re.sub(r" +\n", "\n", text)
+        text = re.sub(r"\n +", "\n", text)
+        text = re.sub(r"  +", " ", text)
+
+        return text
+
+    @staticmethod
+    def enforce_headings(text: str) -> str:
+        text = re.sub(r"\s*(ЗАГАЛЬНА ЧАСТИНА|ОСОБЛИВА ЧАСТИНА|ПЕРЕХІДНІ ТА ПРИКІНЦЕВІ ПОЛОЖЕННЯ)\s*", r"\n\n\1\n\n",
+                      text)
+        text = re.sub(r"(Стаття\s+\d+(?:-\d+)?\.)", r"\n\1\n", text)
+        text = re.sub(r"(?<!\{)\s*(Розділ [IVXLC]+(?:\s*-\s*\d+)?)\s*\.?\s*", r"\n\1\n", text)
+        text = re.sub(r"([А-ЯІЇЄҐ][А-ЯІЇЄҐ\s,]{3,})\s+(Стаття|\{)", r"\1\n\n\2", text)
+        text = re.sub(r"(\})\s*(Стаття \d+[-\d]*\.\s+[А-ЯІЇЄҐА-я])", r"\1\n\2", text)
+        text = re.sub(r"\s*(Стаття \d+[-\d]*\.)\s+([А-ЯІЇЄҐ])", r"\n\1 \2", text)
+        text = re.sub(r"\n{3,}", "\n\n", text)
+
+        return text.strip()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return LegacyTextNormalizer.enforce_headings(
+            LegacyTextNormalizer.fix_line_breaks(
+                LegacyTextNormalizer.normalize_apostrophes(text)
+            )
+        )
+
+
+FUZZ_TOKENS = [
+    "Стаття", "Стаття ", "Стаття  ", "Розділ ", "Розділ", "ЗАГАЛЬНА ЧАСТИНА", "ОСОБЛИВА ЧАСТИНА",
+    "ПЕРЕХІДНІ ТА ПРИКІНЦЕВІ ПОЛОЖЕННЯ", "ЗЛОЧИНИ ПРОТИ ВЛАСНОСТІ", "ГЛАВА", "I", "IV", "XII", "1", "15", "336",
+    "-", " - ", ".", ",", " ", "  ", "   ", "\n", "\n\n", "\n\n\n", " \n", "\n ", "\t", " ", " ",
+    "{", "}", "{Стаття 5 виключено}", "слово", "Крадіжка", "крадіжка", "майна", "Х", "ї", "'", "ʼ", "’", "а",
+    "-\n", "- \n ", "слово-", "_",
+]
+
+
+def fuzz_fragment(rng: random.Random) -> str:
+    return "".join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(1, 60)))
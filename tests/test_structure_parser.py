@@ -0,0 +1,109 @@
+"""
+Embedder.parse_main_structure and parse_additional_structure walk the StructureParser
+tree and must produce exactly the chunks the original nested finditer loops produced.
+
+python -m pytest -q tests
+"""
+import os
+import random
+
+import pytest
+
+from ml.embedder import Embedder
+from ml.preprocessing.legal_text_patterns import LegalTextPatterns
+from ml.preprocessing.text_normalizer import TextNormalizer
+from tests.legacy_structure_parser import LegacyStructureParser, fuzz_document
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "criminal_code_excerpt.txt")
+FUZZ_SEED = 0
+FUZZ_DOCUMENTS = 2000
+
+# the excerpt ends with the start of the second part of the code, as split by TextProcessor
+ADDITIONAL_PART_HEADING = "ПРИКІНЦЕВІ ТА ПЕРЕХІДНІ ПОЛОЖЕННЯ"
+
+
+@pytest.fixture(scope="module")
+def embedder():
+    # only the splitter and chunk ids are used, nothing is embedded
+    return Embedder(embedder=None, max_chunk_tokens=1000, law_name="test", source_file="test.pdf")
+
+
+def load_fixture() -> str:
+    with open(FIXTURE_PATH, encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def main_structure(embedder, text):
+    return embedder.parse_main_structure(
+        text,
+        LegalTextPatterns.PART_PATTERN,
+        LegalTextPatterns.SECTION_PATTERN_MAIN_PART,
+        LegalTextPatterns.ARTICLE_PATTERN_MAIN_PART
+    )
+
+
+def legacy_main_structure(embedder, text):
+    entries = LegacyStructureParser.parse_main(
+        text,
+        LegalTextPatterns.PART_PATTERN,
+        LegalTextPatterns.SECTION_PATTERN_MAIN_PART,
+        LegalTextPatterns.ARTICLE_PATTERN_MAIN_PART
+    )
+
+    return [
+        chunk
+        for part, section, number, title in entries
+        for chunk in embedder.prepare_chunks(
+            text=f"Стаття {number}. {title}", part=part, section_title=section, article_num=number
+        )
+    ]
+
+
+def additional_structure(embedder, text):
+    return embedder.parse_additional_structure(
+        text, LegalTextPatterns.PART_PATTERN, LegalTextPatterns.SECTION_PATTERN_ADDITIONAL_PART
+    )
+
+
+def legacy_additional_structure(embedder, text):
+    entries = LegacyStructureParser.parse_additional(
+        text, LegalTextPatterns.PART_PATTERN, LegalTextPatterns.SECTION_PATTERN_ADDITIONAL_PART
+    )
+
+    return [
+        chunk
+        for part, section, _, section_text in entries
+        for chunk in embedder.prepare_chunks(text=section_text, part=part, section_title=section)
+    ]
+
+
+STRUCTURES = [
+    pytest.param(main_structure, legacy_main_structure, id="main"),
+    pytest.param(additional_structure, legacy_additional_structure, id="additional"),
+]
+
+
+@pytest.mark.parametrize("current, legacy", STRUCTURES)
+def test_fuzz_matches_legacy(embedder, current, legacy):
+    rng = random.Random(FUZZ_SEED)
+
+    for _ in range(FUZZ_DOCUMENTS):
+        document = fuzz_document(rng)
+        assert current(embedder, document) == legacy(embedder, document), document
+
+
+def test_excerpt_matches_legacy(embedder):
+    excerpt = load_fixture()
+    split = excerpt.index(ADDITIONAL_PART_HEADING)
+    # same preparation as IngestionPipeline._iter_entries
+    main_text = TextNormalizer.normalize(excerpt[:split]) + "\nСтаття 999. Кінець документа"
+    additional_text = TextNormalizer.normalize(excerpt[split:])
+
+    main_entries = main_structure(embedder, main_text)
+    additional_entries = additional_structure(embedder, additional_text)
+
+    assert main_entries == legacy_main_structure(embedder, main_text)
+    assert additional_entries == legacy_additional_structure(embedder, additional_text)
+    # guards against an excerpt the patterns no longer find anything in
+    assert {entry["metadata"]["part"] for entry in main_entries} == {"ЗАГАЛЬНА ЧАСТИНА", "ОСОБЛИВА ЧАСТИНА"}
+    assert additional_entries
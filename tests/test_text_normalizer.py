@@ -0,0 +1,49 @@
+"""
+TextNormalizer must produce exactly what the original re.sub chain produced.
+
+python -m pytest -q tests
+"""
+import os
+import random
+
+import pytest
+
+from ml.preprocessing.text_normalizer import TextNormalizer
+from tests.legacy_text_normalizer import LegacyTextNormalizer, fuzz_fragment
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "criminal_code_excerpt.txt")
+FUZZ_SEED = 0
+FUZZ_FRAGMENTS = 5000
+
+FUNCTIONS = ["normalize_apostrophes", "fix_line_breaks", "enforce_headings", "normalize"]
+
+
+def load_fixture() -> str:
+    # newline="" keeps the PDF line breaks and trailing spaces as extracted
+    with open(FIXTURE_PATH, encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("name", FUNCTIONS)
+def test_fuzz_matches_legacy(name):
+    legacy, current = getattr(LegacyTextNormalizer, name), getattr(TextNormalizer, name)
+    rng = random.Random(FUZZ_SEED)
+
+    for _ in range(FUZZ_FRAGMENTS):
+        fragment = fuzz_fragment(rng)
+        assert current(fragment) == legacy(fragment), fragment
+
+
+@pytest.mark.parametrize("name", FUNCTIONS)
+def test_fixture_matches_legacy(name):
+    text = load_fixture()
+
+    assert getattr(TextNormalizer, name)(text) == getattr(LegacyTextNormalizer, name)(text)
+
+
+def test_fixture_is_normalized():
+    # guards against a fixture that no rule touches
+    text = load_fixture()
+
+    assert TextNormalizer.normalize(text) != text
+    assert "\nСтаття 1. Завдання Кримінального кодексу України" in TextNormalizer.normalize(text)
@@ -1,22 +1,184 @@
-from typing import List, Dict
+import time
+from typing import Iterable, Iterator, List, Dict, Optional, Set, Tuple
 
 import config
-from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from bm25_index import BM25Index
+from numpy_vector_store import NumpyVectorStore
+from query_embedding_cache import QueryEmbeddingCache
 
 
 class VectorDB:
-    def __init__(self):
-        self.vectordb = Chroma(
-            persist_directory=config.PERSIST_DIR,
-            collection_name=config.COLLECTION_NAME,
-            embedding_function=config.EMBEDDER
+    def __init__(self, backend: Optional[str] = None):
+        # "chroma" is the source of truth and the only backend ingestion writes to;
+        # "numpy" serves reads from the matrix exported by ingestion
+        self.backend = backend or config.VECTOR_BACKEND
+        self.vectordb = None
+        self.numpy_store: Optional[NumpyVectorStore] = None
+
+        if self.backend == "numpy":
+            self.numpy_store = NumpyVectorStore().load()
+        elif self.backend == "chroma":
+            # imported here so code that never opens the collection does not load chromadb
+            from langchain_chroma import Chroma
+
+            self.vectordb = Chroma(
+                persist_directory=config.PERSIST_DIR,
+                collection_name=config.COLLECTION_NAME,
+                embedding_function=config.EMBEDDER
+            )
+        else:
+            raise ValueError(f"Unknown VECTOR_BACKEND '{self.backend}', expected 'chroma' or 'numpy'.")
+
+        self.check_dimensions()
+
+        self.query_embedding_cache = QueryEmbeddingCache(
+            max_entries=config.QUERY_EMBEDDING_CACHE_MAX_ENTRIES,
+            ttl_seconds=config.QUERY_EMBEDDING_CACHE_TTL_SECONDS
         )
+        self.lexical_index: Optional[BM25Index] = None
+
+    def check_dimensions(self):
+        # vectors of another width than the embedder's would fail every vector query (Chroma) or
+        # every search (numpy store, which may only be narrower), so refuse to start instead
+        stored = self.stored_dimensions()
+        expected = getattr(config.EMBEDDER, "dimensions", None) or config.EMBEDDING_MODEL_DIMENSIONS.get(
+            getattr(config.EMBEDDER, "model", None)
+        )
+        if stored is None or expected is None:
+            return
+
+        if stored > expected or (self.numpy_store is None and stored != expected):
+            raise ValueError(
+                f"The {self.backend} store in '{config.PERSIST_DIR}' holds {stored}-dimensional vectors, but the "
+                f"embedder produces {expected}. EMBEDDING_MODEL / EMBEDDING_DIMENSIONS changed since ingestion: "
+                f"re-ingest into a fresh PERSIST_DIR or restore the previous setting."
+            )
+
+    def stored_dimensions(self) -> Optional[int]:
+        if self.numpy_store is not None:
+            return None if self.numpy_store.matrix is None else self.numpy_store.matrix.shape[1]
+
+        embeddings = self.vectordb._collection.get(limit=1, include=["embeddings"])["embeddings"]
+
+        return None if embeddings is None or len(embeddings) == 0 else len(embeddings[0])
+
+    def embed_query(self, query: str) -> List[float]:
+        # the normalized query only keys the cache, the embedding is of the text as the user wrote it
+        key = self.query_embedding_cache.normalize(query)
+        vector = self.query_embedding_cache.get(key)
+
+        if vector is None:
+            start = time.perf_counter()
+            vector = config.EMBEDDER.embed_query(query)
+            self.query_embedding_cache.put(key, vector, time.perf_counter() - start)
+
+        return vector
+
+    async def aembed_query(self, query: str) -> List[float]:
+        key = self.query_embedding_cache.normalize(query)
+        vector = self.query_embedding_cache.get(key)
+
+        if vector is None:
+            start = time.perf_counter()
+            vector = await config.EMBEDDER.aembed_query(query)
+            self.query_embedding_cache.put(key, vector, time.perf_counter() - start)
+
+        return vector
+
+    def similarity_search(self, query: str, k: int = 5, embedding: Optional[List[float]] = None):
+        # the query is embedded through the cache rather than by Chroma, callers may pass a vector they already have
+        if embedding is None:
+            embedding = self.embed_query(query)
+
+        if self.numpy_store is not None:
+            return self.numpy_store.similarity_search_by_vector(embedding, k)
+
+        return self.vectordb.similarity_search_by_vector(embedding=embedding, k=k)
+
+    def similarity_search_batch(self, queries: List[str], k: int = 5) -> List[List[Document]]:
+        embeddings = [self.embed_query(query) for query in queries]
+
+        if self.numpy_store is not None:
+            return self.numpy_store.similarity_search_by_vectors(embeddings, k)
+
+        return [self.vectordb.similarity_search_by_vector(embedding=embedding, k=k) for embedding in embeddings]
+
+    def reload_vectors(self):
+        # the numpy backend serves a snapshot, so it has to be re-read after ingestion; Chroma is live
+        if self.numpy_store is not None:
+            self.numpy_store = NumpyVectorStore().load()
 
-    def similarity_search(self, query: str, k: int = 5):
+    def load_lexical_index(self):
+        # replaced as a whole so searches running during a reload keep using the old index
+        self.lexical_index = BM25Index().load(self)
 
-        return self.vectordb.similarity_search(query=query, k=k)
+    def lexical_search(self, query: str, k: int = 5) -> List[Document]:
+        index = self.lexical_index
+
+        return [
+            Document(id=index.ids[doc_idx], page_content=index.texts[doc_idx], metadata=index.metadatas[doc_idx])
+            for doc_idx, _ in index.search(query, k)
+        ]
+
+    def hybrid_search(self, query: str, k: int = 5, embedding: Optional[List[float]] = None,
+                      lexical_only: bool = False) -> List[Document]:
+        # reciprocal rank fusion of BM25 and vector rankings; lexical_only is the degraded mode
+        # used when the embedding API is slow or down
+        candidates = k * config.HYBRID_CANDIDATES_MULTIPLIER
+        rankings = [self.lexical_search(query, candidates)]
+
+        if not lexical_only:
+            rankings.append(self.similarity_search(query, candidates, embedding=embedding))
+
+        scores = {}
+        documents = {}
+        for ranking in rankings:
+            for rank, doc in enumerate(ranking):
+                key = doc.id or doc.page_content
+                scores[key] = scores.get(key, 0.0) + 1.0 / (config.RRF_K + rank + 1)
+                documents.setdefault(key, doc)
+
+        best = sorted(scores, key=scores.get, reverse=True)[:k]
+
+        return [documents[key] for key in best]
+
+    def get_all_chunks(self) -> Tuple[List[str], List[str], List[Dict]]:
+        if self.numpy_store is not None:
+            return self.numpy_store.get()
+
+        data = self.vectordb._collection.get(include=["documents", "metadatas"])
+
+        return data["ids"], data["documents"], data["metadatas"]
+
+    def get_chunks(self, where: Dict) -> Tuple[List[str], List[Dict]]:
+        if self.numpy_store is not None:
+            _, documents, metadatas = self.numpy_store.get(where)
+            return documents, metadatas
+
+        data = self.vectordb._collection.get(where=where, include=["documents", "metadatas"])
+
+        return data["documents"], data["metadatas"]
+
+    def export_numpy_store(self, dtype: Optional[str] = None, dimensions: Optional[int] = None,
+                           directory: Optional[str] = None):
+        # ingestion-side: dumps the whole collection into the matrix the numpy backend memory-maps
+        data = self.vectordb._collection.get(include=["documents", "metadatas", "embeddings"])
+
+        NumpyVectorStore.write(
+            data["ids"], data["documents"], data["metadatas"], data["embeddings"],
+            dtype=dtype or config.NUMPY_STORE_DTYPE,
+            dimensions=dimensions or config.NUMPY_STORE_DIMENSIONS,
+            directory=directory
+        )
 
     def have_data(self):
+        if self.numpy_store is not None:
+            count = self.numpy_store.count()
+            print(f"NumPy vector store has {count} documents.")
+            return count
+
         count = self.vectordb._collection.count()
 
         if count == 0:
@@ -28,17 +190,49 @@ class VectorDB:
 
         return count
 
+    def get_ids(self) -> Set[str]:
+        return set(self.vectordb._collection.get(include=[])["ids"])
+
+    def diff_entries(self, db_entries: List[Dict]) -> Tuple[List[Dict], Set[str]]:
+        existing_ids = self.get_ids()
+        seen_ids = set()
+        new_entries = list(self.iter_new_entries(db_entries, existing_ids, seen_ids))
+
+        return new_entries, existing_ids - seen_ids
+
+    @staticmethod
+    def iter_new_entries(db_entries: Iterable[Dict], existing_ids: Set[str], seen_ids: Set[str]) -> Iterator[Dict]:
+        # chunk ids are content-addressed: an unchanged chunk keeps its id, a changed one gets a new id;
+        # seen_ids is filled while iterating, stale ids are existing_ids - seen_ids once the stream is consumed
+        for entry in db_entries:
+            if entry["id"] in seen_ids:
+                continue
+            seen_ids.add(entry["id"])
+
+            if entry["id"] not in existing_ids:
+                yield entry
+
     def upload_data(self, db_entries: List[Dict]):
+        # upsert by id, so re-uploading the same chunks does not duplicate them;
+        # add_texts would drop the precomputed vectors and embed every text again
+        batch_size = config.VECTOR_DB_UPLOAD_BATCH_SIZE
 
-        texts = [entry["page_content"] for entry in db_entries]
-        metadatas = [entry["metadata"] for entry in db_entries]
-        embeddings = [entry["vector"] for entry in db_entries]
+        for i in range(0, len(db_entries), batch_size):
+            batch = db_entries[i:i + batch_size]
 
-        self.vectordb.add_texts(
-            texts=texts,
-            embeddings=embeddings,
-            metadatas=metadatas
-        )
+            self.vectordb._collection.upsert(
+                ids=[entry["id"] for entry in batch],
+                embeddings=[entry["vector"] for entry in batch],
+                metadatas=[entry["metadata"] for entry in batch],
+                documents=[entry["page_content"] for entry in batch]
+            )
+
+    def delete_ids(self, ids: Set[str]):
+        ids = list(ids)
+        batch_size = config.VECTOR_DB_UPLOAD_BATCH_SIZE
+
+        for i in range(0, len(ids), batch_size):
+            self.vectordb.delete(ids=ids[i:i + batch_size])
 
 
 if __name__ == "__main__":